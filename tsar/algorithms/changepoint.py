@@ -0,0 +1,171 @@
+"""Change-point detection with Singular Spectrum Analysis
+
+"""
+import numpy as np
+
+from tsar.algorithms.hankel import _embed
+from tsar.algorithms.sequentialssa import SequentialSsa
+
+
+def changepoints(ts, window, n_components, base, test=None, lag=0, n_tracked=None):
+    """Sliding SSA change-point detection statistic
+
+    A base segment of the series is described by the subspace spanned by
+    the n_components leading eigenvectors of its trajectory matrix. The
+    lagged vectors of a later test segment are compared to this subspace
+    with the heterogeneity index [1]
+
+        h = sum_j dist(x_j, U)^2 / sum_j ||x_j||^2
+
+    which is close to 0 when the test segment follows the structure of
+    the base segment and increases after a structural change.
+
+    Both segments slide with the series. Eigenvectors of the base
+    segment are tracked by the low-rank updates of SequentialSsa and the
+    lag-covariance matrix C of the test segment is updated with a
+    rank-one term per added and removed lagged vector, so that
+    h = 1 - trace(U'.C.U) / trace(C) costs O(L^2.r) per sample instead
+    of one singular value decomposition per position.
+
+    Values are consumed lazily and statistics are yielded as soon as both
+    segments are complete, so that the detector can run on a stream.
+    Arguments are checked when the detector is created.
+
+    Parameters
+    ----------
+    ts : iterable
+        Iterable of the time series values, eg. an array or a generator.
+    window : int
+        Window length L of the trajectory matrices.
+    n_components : int
+        Number of leading eigenvectors spanning the base subspace.
+    base : int
+        Length of the base segment, greater or equal to window.
+    test : int, optional
+        Length of the test segment, greater or equal to window. Default
+        is base.
+    lag : int, optional
+        Number of samples between the end of the base segment and the
+        start of the test segment. Default is 0.
+    n_tracked : int, optional
+        Number of eigenpairs tracked for the base segment, greater or
+        equal to n_components. More tracked eigenpairs make the tracking
+        more accurate, see SequentialSsa. Default is
+        min(window, 2 * n_components + 2).
+
+    Returns
+    -------
+    detector : generator
+        generator of (index, statistic) tuples, where index is the
+        position of the last sample of the test segment and statistic
+        the heterogeneity index of the test segment with respect to the
+        base segment
+
+    Examples
+    --------
+
+    Period change of a sine wave at sample 300
+
+    >>> t = np.arange(600)
+    >>> x = np.where(t < 300, np.sin(2 * np.pi * t / 12.), np.sin(2 * np.pi * t / 7.))
+    >>> detector = changepoints(x, window=20, n_components=2, base=100, test=20)
+    >>> next(index for index, h in detector if h > 0.1)
+    305
+
+    References
+    ----------
+
+    [1] Golyandina, N., Nekrutkin, V., and Zhigljavsky, A. Analysis of Time
+    Series Structure: SSA and Related Techniques. Chapman and Hall/CRC, 2001.
+    Chapter 3.
+
+    [2] Moskvina, V., and Zhigljavsky, A. "An Algorithm Based on Singular
+    Spectrum Analysis for Change-Point Detection." Communications in
+    Statistics - Simulation and Computation 32, no. 2 (2003): 319-52.
+
+    """
+
+    if test is None:
+        test = base
+
+    if min(base, test) < window:
+        raise ValueError('base and test lengths should be greater or equal to window {}.'.format(window))
+
+    if not 0 < n_components <= window:
+        raise ValueError('n_components should be in range [1, {}].'.format(window))
+
+    if n_tracked is None:
+        n_tracked = min(window, 2 * n_components + 2)
+
+    if not n_components <= n_tracked <= window:
+        raise ValueError('n_tracked should be in range [{}, {}].'.format(n_components, window))
+
+    if lag < 0:
+        raise ValueError('lag should be positive.')
+
+    return _changepoints(ts, window, n_components, base, test, lag, n_tracked)
+
+
+def _changepoints(ts, window, n_components, base, test, lag, n_tracked):
+    """Generator of the statistics of changepoints with checked arguments"""
+
+    tracker = SequentialSsa(window, n_components=n_tracked, maxlen=base, tstype=np.array)
+
+    ktest = test - window + 1
+
+    # the last samples, from the one entering the base segment to the
+    # current one, are kept in a buffer of twice their number so that
+    # they are contiguous and shifted once every span samples
+
+    span = test + lag + 1
+    buf = np.empty(2 * span)
+    size = 0
+
+    # lag-covariance matrix of the test segment and its trace
+
+    c = np.zeros(shape=(window, window))
+    trace = 0.
+
+    for index, value in enumerate(ts):
+
+        if size == len(buf):
+            buf[:span] = buf[span:]
+            size = span
+
+        buf[size] = value
+        size += 1
+
+        # sample leaving the lag segment enters the base segment
+
+        if index >= span - 1:
+            tracker.append(buf[size - span])
+
+        if index < window - 1:
+            continue
+
+        # the test matrix is recomputed once every ktest samples to
+        # avoid the accumulation of rounding errors, otherwise it is
+        # updated with the added and removed lagged vectors
+
+        if index >= test - 1 and (index - test + 1) % ktest == 0:
+            x = _embed(buf[size - test:size], window)
+            c = np.dot(x, x.T)
+            trace = np.sum(x ** 2)
+        else:
+            added = buf[size - window:size]
+            c += np.outer(added, added)
+            trace += np.dot(added, added)
+
+            if index >= test:
+                removed = buf[size - ktest - window:size - ktest]
+                c -= np.outer(removed, removed)
+                trace -= np.dot(removed, removed)
+
+        if len(tracker) < base:
+            continue
+
+        u = tracker.svd[0][:, :n_components]
+
+        statistic = 1. - np.sum(u * np.dot(c, u)) / trace if trace > 0 else 0.
+
+        yield index, statistic
@@ -0,0 +1,377 @@
+"""Algorithms for lagged Pearson correlations
+"""
+from contextlib import closing
+
+import numpy as np
+
+from tsar.algorithms.hankel import _BLOCK_SIZE, _nextpow2
+from tsar.algorithms.parallel import _poolimap, _poolmap
+
+
+def _lagged_products(x, maxlag, method='fft'):
+    """Sums of lagged products of the columns of x
+
+    Computes sum_t x[t + k] . x[t] for each lag k in [0, maxlag] and each
+    column, either with one FFT per column in O(N log N) or with one dot
+    product per lag in O(N.maxlag).
+
+    Parameters
+    ----------
+    x : np.array
+        array of shape (N, m)
+    maxlag : int
+        maximum lag, lower than N
+    method : str, optional
+        'fft' or 'direct'
+
+    Returns
+    -------
+    r : np.array
+        array of shape (maxlag + 1, m)
+
+    """
+
+    n = x.shape[0]
+
+    if method == 'fft':
+
+        # zero padding to N + maxlag avoids circular aliasing
+
+        nfft = _nextpow2(n + maxlag)
+        fx = np.fft.rfft(x, n=nfft, axis=0)
+
+        return np.fft.irfft(fx * np.conj(fx), n=nfft, axis=0)[:maxlag + 1]
+
+    return np.array([np.einsum('ij,ij->j', x[k:], x[:n - k]) for k in range(maxlag + 1)])
+
+
+def _autocorrelation(x, maxlag, method='fft'):
+    """Pearson correlation of the columns of x with their lags
+
+    The correlation at lag k is the Pearson correlation coefficient of
+    x[k:] and x[:N - k], each sample being centered and scaled with its
+    own mean and standard deviation, as pd.Series.autocorr. Sums of the
+    samples and of their squares are obtained from prefix sums, so that
+    all lags cost a single pass once the lagged products are known.
+
+    Parameters
+    ----------
+    x : np.array
+        array of shape (N, m)
+    maxlag : int
+        maximum lag, lower than N
+    method : str, optional
+        'fft' or 'direct', see _lagged_products
+
+    Returns
+    -------
+    rho : np.array
+        array of shape (maxlag + 1, m)
+
+    """
+
+    n = x.shape[0]
+
+    # correlations do not depend on the mean, centering reduces
+    # cancellation errors
+
+    x = x - x.mean(axis=0)
+
+    sxy = _lagged_products(x, maxlag, method=method)
+
+    # prefix sums of the values and of their squares
+
+    zero = np.zeros(shape=(1, x.shape[1]))
+    s1 = np.concatenate([zero, np.cumsum(x, axis=0)])
+    s2 = np.concatenate([zero, np.cumsum(x ** 2, axis=0)])
+
+    lags = np.arange(maxlag + 1)
+    m = (n - lags)[:, np.newaxis].astype(float)
+
+    # sums over x[k:] (a) and over x[:n - k] (b)
+
+    sa = s1[n] - s1[lags]
+    sb = s1[n - lags]
+    saa = s2[n] - s2[lags]
+    sbb = s2[n - lags]
+
+    return _pearson(sxy, sa, sb, saa, sbb, m)
+
+
+def _pearson(sab, sa, sb, saa, sbb, m):
+    """Pearson correlation coefficients from sums over m pairs (a, b)"""
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sab - sa * sb / m
+        var = (saa - sa ** 2 / m) * (sbb - sb ** 2 / m)
+        rho = cov / np.sqrt(var)
+
+    return rho
+
+
+def _crosscorrelation(x, y, maxlag, method='fft'):
+    """Pearson correlation of x with the lags of y
+
+    The correlation at lag k in [-maxlag, maxlag] is the Pearson
+    correlation coefficient of the pairs (x[t], y[t + k]) over the
+    overlap of both series, each sample being centered and scaled with
+    its own mean and standard deviation.
+
+    Parameters
+    ----------
+    x : np.array
+        series of length N
+    y : np.array
+        series of length M
+    maxlag : int
+        maximum lag, lower than N and M
+    method : str, optional
+        'fft' or 'direct'
+
+    Returns
+    -------
+    rho : np.array
+        array of size 2 * maxlag + 1, rho[maxlag + k] holding the
+        correlation at lag k
+
+    """
+
+    n, m = len(x), len(y)
+
+    x = x - x.mean()
+    y = y - y.mean()
+
+    lags = np.arange(-maxlag, maxlag + 1)
+
+    if method == 'fft':
+
+        # zero padding to max(N, M) + maxlag avoids circular aliasing
+        # on both negative and positive lags
+
+        nfft = _nextpow2(max(n, m) + maxlag)
+        c = np.fft.irfft(np.conj(np.fft.rfft(x, n=nfft)) * np.fft.rfft(y, n=nfft), n=nfft)
+        sxy = c[lags % nfft]
+
+    else:
+
+        sxy = np.array([np.dot(x[max(0, -k):min(n, m - k)], y[max(0, k):min(m, n + k)]) for k in lags])
+
+    # overlap of the lag k is x[a:b] and y[a + k:b + k]
+
+    a = np.maximum(0, -lags)
+    b = np.minimum(n, m - lags)
+
+    s1x = np.concatenate([[0.], np.cumsum(x)])
+    s2x = np.concatenate([[0.], np.cumsum(x ** 2)])
+    s1y = np.concatenate([[0.], np.cumsum(y)])
+    s2y = np.concatenate([[0.], np.cumsum(y ** 2)])
+
+    return _pearson(sxy,
+                    s1x[b] - s1x[a], s1y[b + lags] - s1y[a + lags],
+                    s2x[b] - s2x[a], s2y[b + lags] - s2y[a + lags],
+                    (b - a).astype(float))
+
+
+def _blockautocorrelation(x, maxlag, method='fft', n_jobs=None):
+    """Autocorrelation of the columns of x by blocks of columns
+
+    Columns are processed in blocks so that the Fourier transforms of a
+    block hold at most _BLOCK_SIZE values. Blocks can be processed by a
+    pool of threads, numpy FFTs and products releasing the GIL.
+
+    Parameters
+    ----------
+    x : np.array
+        array of shape (N, m)
+    maxlag : int
+        maximum lag, lower than N
+    method : str, optional
+        'fft' or 'direct', see _lagged_products
+    n_jobs : int, optional
+        number of threads. Default is None, blocks are processed in
+        the current thread.
+
+    Returns
+    -------
+    rho : np.array
+        array of shape (maxlag + 1, m)
+
+    """
+
+    n, m = x.shape
+
+    block = max(1, _BLOCK_SIZE // _nextpow2(n + maxlag))
+    slices = [slice(i, i + block) for i in range(0, m, block)]
+
+    rho = np.empty(shape=(maxlag + 1, m))
+
+    def work(columns):
+        rho[:, columns] = _autocorrelation(x[:, columns], maxlag, method=method)
+
+    _poolmap(work, slices, n_jobs=n_jobs, threads=True)
+
+    return rho
+
+
+def _peakcrosscorrelation(args):
+    """Peak cross correlations of a block of pairs of series
+
+    Parameters
+    ----------
+    args : tuple
+        (fa, fb, sa, sb, n, maxlag) where fa and fb are the Fourier
+        transforms of the centered series of shape (nfft // 2 + 1, p)
+        and (nfft // 2 + 1, q), sa and sb are tuples of prefix sums of
+        the series and of their squares of shape (N + 1, p) and
+        (N + 1, q), and n is the series length N
+
+    Returns
+    -------
+    peak : np.array
+        maximum over lags of the cross correlations of shape (p, q)
+    lag : np.array
+        lags of the maxima of shape (p, q)
+
+    """
+
+    fa, fb, sa, sb, n, maxlag = args
+
+    nfft = 2 * (fa.shape[0] - 1)
+    lags = np.arange(-maxlag, maxlag + 1)
+
+    c = np.fft.irfft(np.conj(fa)[:, :, np.newaxis] * fb[:, np.newaxis, :], n=nfft, axis=0)
+    sab = c[lags % nfft]
+
+    # overlap of the lag k is a[lo:hi] and b[lo + k:hi + k]
+
+    lo = np.maximum(0, -lags)
+    hi = np.minimum(n, n - lags)
+
+    s1a, s2a = sa
+    s1b, s2b = sb
+
+    rho = _pearson(sab,
+                   (s1a[hi] - s1a[lo])[:, :, np.newaxis], (s1b[hi + lags] - s1b[lo + lags])[:, np.newaxis, :],
+                   (s2a[hi] - s2a[lo])[:, :, np.newaxis], (s2b[hi + lags] - s2b[lo + lags])[:, np.newaxis, :],
+                   (hi - lo).astype(float)[:, np.newaxis, np.newaxis])
+
+    # null variance overlaps are ignored
+
+    rho[np.isnan(rho)] = -np.inf
+
+    best = np.argmax(rho, axis=0)
+    peak = np.take_along_axis(rho, best[np.newaxis], axis=0)[0]
+
+    return peak, best - maxlag
+
+
+def _mergetopk(values, index, lags, cvalues, cindex, clags, k):
+    """Merge candidates into the k largest values of each row"""
+
+    values = np.hstack([values, cvalues])
+    index = np.hstack([index, cindex])
+    lags = np.hstack([lags, clags])
+
+    order = np.argsort(-values, axis=1, kind='mergesort')[:, :k]
+    rows = np.arange(values.shape[0])[:, np.newaxis]
+
+    return values[rows, order], index[rows, order], lags[rows, order]
+
+
+def _pairwisecrosscorrelation(x, maxlag, topk=None, n_jobs=None):
+    """Peak cross correlations of all pairs of columns of x
+
+    The Fourier transform of each column is computed once. Pairs are
+    processed by square blocks of columns whose lagged products hold at
+    most _BLOCK_SIZE values, and only blocks of the upper triangle are
+    computed, the lower one being obtained by symmetry: the correlation
+    of b with the lag k of a is the one of a with the lag -k of b.
+
+    Parameters
+    ----------
+    x : np.array
+        array of shape (N, n)
+    maxlag : int
+        maximum absolute lag, lower than N
+    topk : int, optional
+        if given, only the topk largest peaks of each column are kept
+    n_jobs : int, optional
+        number of processes. Default is None, blocks are processed in
+        the current process.
+
+    Returns
+    -------
+    peak, lag : np.array
+        arrays of shape (n, n), or (n, topk) if topk is given
+    index : np.array
+        columns of the topk peaks of shape (n, topk), only returned if
+        topk is given
+
+    """
+
+    n, m = x.shape
+
+    x = x - x.mean(axis=0)
+
+    nfft = _nextpow2(n + maxlag)
+    fx = np.fft.rfft(x, n=nfft, axis=0)
+
+    zero = np.zeros(shape=(1, m))
+    s1 = np.concatenate([zero, np.cumsum(x, axis=0)])
+    s2 = np.concatenate([zero, np.cumsum(x ** 2, axis=0)])
+
+    # square blocks of columns bounding the size of the lagged products
+
+    block = max(1, int(np.sqrt(_BLOCK_SIZE // nfft)))
+    starts = range(0, m, block)
+
+    pairs = [(i, j) for i in starts for j in starts if i <= j]
+
+    def task(pair):
+        a, b = slice(pair[0], pair[0] + block), slice(pair[1], pair[1] + block)
+        return (fx[:, a], fx[:, b], (s1[:, a], s2[:, a]), (s1[:, b], s2[:, b]), n, maxlag)
+
+    tasks = [task(pair) for pair in pairs]
+
+    if topk is None:
+        peak = np.empty(shape=(m, m))
+        lag = np.empty(shape=(m, m), dtype=int)
+    else:
+        topk = min(topk, m - 1)
+        peak = np.full((m, topk), -np.inf)
+        index = np.full((m, topk), -1, dtype=int)
+        lag = np.zeros(shape=(m, topk), dtype=int)
+
+    # block results are merged as they are computed
+
+    with closing(_poolimap(_peakcrosscorrelation, tasks, n_jobs=n_jobs)) as results:
+        for (i, j), (bpeak, blag) in ((pairs[b], r) for b, r in enumerate(results)):
+
+            rows = np.arange(i, min(i + block, m))
+            cols = np.arange(j, min(j + block, m))
+
+            if topk is None:
+                peak[i:i + block, j:j + block] = bpeak
+                lag[i:i + block, j:j + block] = blag
+                peak[j:j + block, i:i + block] = bpeak.T
+                lag[j:j + block, i:i + block] = -blag.T
+                continue
+
+            # candidates of the block rows and, by symmetry, of the
+            # block columns, pairs of a series with itself excluded
+
+            bpeak = np.where(rows[:, np.newaxis] == cols, -np.inf, bpeak)
+
+            cindex = np.broadcast_to(cols, bpeak.shape)
+            peak[rows], index[rows], lag[rows] = _mergetopk(peak[rows], index[rows], lag[rows],
+                                                            bpeak, cindex, blag, topk)
+
+            if i != j:
+                cindex = np.broadcast_to(rows, bpeak.T.shape)
+                peak[cols], index[cols], lag[cols] = _mergetopk(peak[cols], index[cols], lag[cols],
+                                                                bpeak.T, cindex, -blag.T, topk)
+
+    if topk is None:
+        return peak, lag
+
+    return index, peak, lag
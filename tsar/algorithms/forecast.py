@@ -0,0 +1,169 @@
+"""Recurrent and vector forecasting of SSA reconstructions
+
+"""
+import numpy as np
+
+
+def _lrr(u):
+    """Linear recurrence coefficients and vector forecast operator
+
+    See ref [1], paragraphs 2.3.1 and 2.3.2.
+
+    Parameters
+    ----------
+    u : np.array
+        orthonormal eigenvectors of shape (L, r)
+
+    Returns
+    -------
+    r : np.array
+        recurrence coefficients of shape (L - 1,), so that a value is
+        forecast as the dot product of r with the L - 1 previous values
+    p : np.array
+        vector forecast operator of shape (L, L - 1), applied to the
+        last L - 1 components of a lagged vector
+
+    References
+    ----------
+
+    [1] Golyandina, N., and Zhigljavsky, A. Singular Spectrum Analysis for
+    Time Series. Springer Briefs in Statistics. Springer, 2013.
+
+    """
+
+    pi = u[-1]
+    nu2 = np.dot(pi, pi)
+
+    if nu2 >= 1. - 1e-10:
+        raise ValueError('Verticality coefficient is 1, the eigenvectors do not define a recurrence.')
+
+    ufirst = u[:-1]
+
+    r = np.dot(ufirst, pi) / (1. - nu2)
+
+    pv = np.dot(ufirst, ufirst.T) + (1. - nu2) * np.outer(r, r)
+
+    return r, np.vstack([pv, r])
+
+
+def _rforecast(state, r, steps):
+    """Recurrent forecast of batches of series
+
+    Parameters
+    ----------
+    state : np.array
+        last L - 1 values of the series, of shape (..., L - 1)
+    r : np.array
+        recurrence coefficients broadcastable to state
+    steps : int
+        forecast horizon
+
+    Returns
+    -------
+    y : np.array
+        forecast values of shape (..., steps)
+
+    """
+
+    l1 = state.shape[-1]
+
+    y = np.empty(shape=state.shape[:-1] + (l1 + steps,), dtype=state.dtype)
+    y[..., :l1] = state
+
+    for i in range(steps):
+        y[..., l1 + i] = np.sum(r * y[..., i:i + l1], axis=-1)
+
+    return y[..., l1:]
+
+
+def _vforecast(z, p, steps):
+    """Vector forecast of batches of series
+
+    Lagged vectors are continued by the vector forecast operator, then
+    the forecast values are the averages of the antidiagonals of the new
+    lagged vectors.
+
+    Parameters
+    ----------
+    z : np.array
+        last lagged vector of the reconstructed series, of shape (..., L)
+    p : np.array
+        vector forecast operator broadcastable to shape (..., L, L - 1)
+    steps : int
+        forecast horizon
+
+    Returns
+    -------
+    y : np.array
+        forecast values of shape (..., steps)
+
+    """
+
+    l = z.shape[-1]
+    ncols = steps + l - 1
+
+    cols = np.empty(shape=z.shape[:-1] + (ncols, l), dtype=z.dtype)
+
+    last = z
+
+    for j in range(ncols):
+        last = np.einsum('...ij,...j->...i', p, last[..., 1:])
+        cols[..., j, :] = last
+
+    # value m is the average of cols[m + l - 1 - i, i] over i
+
+    i = np.arange(l)
+    m = np.arange(steps)[:, np.newaxis]
+
+    return cols[..., m + l - 1 - i, i].mean(axis=-1)
+
+
+def _prefixtails(u, z, warmup):
+    """Antidiagonal sums of the last lagged vectors of growing prefixes
+
+    The reconstruction of the first n samples of a series is the
+    diagonal average of the projections u.u'.x_j of its lagged vectors
+    j <= n - L. Its last L values only depend on the last L lagged
+    vectors, projections are added one at a time to the sums of the
+    antidiagonals they end, so that the projected trajectory matrix is
+    never formed.
+
+    Parameters
+    ----------
+    u : np.array
+        orthonormal eigenvectors of shape (L, r)
+    z : np.array
+        projections u'.x_j of consecutive lagged vectors, of shape (m, r)
+    warmup : int
+        number of leading lagged vectors only accumulated, in range
+        [0, m)
+
+    Returns
+    -------
+    sums : np.array
+        array of shape (m - warmup, L), row i holds the antidiagonal
+        sums of the last L positions of the prefix ending with lagged
+        vector warmup + i
+
+    """
+
+    l = u.shape[0]
+
+    p = np.dot(z, u.T)
+
+    sums = np.empty(shape=(len(p) - warmup, l), dtype=p.dtype)
+    last = np.zeros(l, dtype=p.dtype)
+
+    for j, x in enumerate(p):
+
+        # positions move one step back and the new lagged vector ends
+        # the antidiagonal of the new last position
+
+        last[:-1] = last[1:]
+        last[-1] = 0.
+        last += x
+
+        if j >= warmup:
+            sums[j - warmup] = last
+
+    return sums
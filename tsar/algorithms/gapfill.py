@@ -0,0 +1,124 @@
+"""Gap filling of time series with iterative Singular Spectrum Analysis
+
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from tsar.algorithms.hankel import _diagavg_rankone, _hankel_fft, _hankel_matmat, _hankel_rmatmat
+from tsar.algorithms.truncatedsvd import _randomized_svd
+
+
+def gapfill(ts, window=None, n_components=10, maxiter=50, tol=1e-4):
+    """Fill missing values by iterative SSA reconstruction
+
+    Missing values (NaN) are first set to the mean of the observed ones.
+    Then the series is alternately reconstructed from its n_components
+    leading eigentriples and the missing values are replaced by the
+    reconstruction, until the imputed values converge [1]. Observed
+    values are left unchanged.
+
+    Each iteration computes a randomized truncated SVD by FFT products
+    with the trajectory matrix. The SVD is warm started from the left
+    singular vectors of the previous iteration, which already span an
+    accurate subspace, so that a single power iteration is needed after
+    the first one. Convergence is checked on the imputed values only.
+
+    Parameters
+    ----------
+    ts : 1d array_like
+        Array like holding the time series values, with missing values
+        set to NaN.
+    window : int, optional
+        Window length L of the trajectory matrix. Default is half
+        the series length.
+    n_components : int, optional
+        Number of leading eigentriples of the reconstruction. Default
+        is 10.
+    maxiter : int, optional
+        Maximum number of iterations. Default is 50.
+    tol : float, optional
+        Convergence tolerance on the largest change of the imputed
+        values, relative to the standard deviation of the observed
+        values. Default is 1e-4.
+
+    Returns
+    -------
+    filled : np.array or pd.Series
+        series with imputed missing values, of the type of ts
+
+    Examples
+    --------
+
+    >>> gappy = co2.copy()
+    >>> gappy[100:112] = np.nan
+    >>> filled = gapfill(gappy, window=120, n_components=6)
+    >>> filled.isnull().sum()
+    0
+
+    References
+    ----------
+
+    [1] Kondrashov, D., and Ghil, M. "Spatio-Temporal Filling of Missing
+    Points in Geophysical Data Sets." Nonlinear Processes in Geophysics 13,
+    no. 2 (2006): 151-59.
+
+    """
+
+    x = np.array(ts, dtype=float)
+
+    if x.ndim != 1:
+        raise TypeError('Input object should be 1 dimensional numeric array like object.')
+
+    missing = np.isnan(x)
+
+    if missing.all():
+        raise ValueError('All values are missing.')
+
+    n = len(x)
+
+    if window is None:
+        window = n // 2
+
+    k = n - window + 1
+
+    if not 0 < n_components <= min(window, k):
+        raise ValueError('n_components should be in range [1, {}].'.format(min(window, k)))
+
+    scale = np.std(x[~missing])
+    scale = scale if scale > 0 else 1.
+
+    x[missing] = np.mean(x[~missing])
+
+    u = None
+    change = 0.
+
+    for i in range(maxiter if missing.any() else 0):
+
+        fts = _hankel_fft(x)
+
+        matmat = lambda m: _hankel_matmat(fts, n, window, m)
+        rmatmat = lambda a: _hankel_rmatmat(fts, n, window, a)
+
+        # warm start from the previous left singular vectors
+
+        u, s, v = _randomized_svd(matmat, rmatmat, (window, k), n_components, q0=u,
+                                  niter=4 if u is None else 1, random_state=0)
+
+        reconstruction = _diagavg_rankone(u, s, v, collapse=True)
+
+        change = np.max(np.abs(reconstruction[missing] - x[missing])) / scale
+
+        x[missing] = reconstruction[missing]
+
+        if change < tol:
+            break
+
+    if change >= tol:
+        warnings.warn('Gap filling did not converge in {} iterations.'.format(maxiter))
+
+    if isinstance(ts, pd.Series):
+        return pd.Series(x, index=ts.index, name=ts.name)
+
+    return x
@@ -0,0 +1,424 @@
+"""Hankel matrix routines for Singular Spectrum Analysis
+
+Diagonal averaging (hankelization) of rank-one matrices is computed
+as a convolution of the left and right singular vectors, so that no
+(window, k) matrix needs to be built.
+
+Results keep the floating point precision of the inputs: single
+precision inputs give single precision outputs, although numpy FFTs
+are computed in double precision on bounded blocks.
+
+"""
+import numpy as np
+
+# maximum number of complex values held in memory by a block of
+# convolutions (16 bytes each, ie about 64 Mb)
+
+_BLOCK_SIZE = 2 ** 22
+
+
+def _floattype(*arrays):
+    """Floating point type of the results computed from arrays"""
+
+    return np.result_type(np.float32, *[a.dtype for a in arrays])
+
+
+def _nextpow2(n):
+    """Smallest power of two greater or equal to n"""
+
+    return 1 << int(np.ceil(np.log2(max(n, 1))))
+
+
+def _embed(ts, window, delay=1):
+    """Embed a time series into a trajectory matrix without copy
+
+    The trajectory matrix is a read-only strided view of the series:
+    column j holds the lagged vector ts[j], ts[j + delay], ...,
+    ts[j + (window - 1) * delay]. Embedding costs O(1) memory.
+
+    Stacked series, ie. arrays of shape (m, n), are embedded along
+    their last axis into a stack of trajectory matrices.
+
+    Parameters
+    ----------
+    ts : array_like
+        the time series, or a stack of series along the last axis
+    window : int
+        window length L, ie. the embedding dimension
+    delay : int, optional
+        time delay between two rows. Default is 1.
+
+    Returns
+    -------
+    x : np.array
+        read-only view of shape (..., window, n - (window - 1) * delay)
+
+    Raises
+    ------
+    ValueError
+        Raised if the window does not fit in the series.
+
+    """
+
+    ts = np.ascontiguousarray(ts)
+    n = ts.shape[-1]
+    k = n - (window - 1) * delay
+
+    if ts.ndim < 1:
+        raise ValueError('Time series should be at least one dimensional.')
+
+    if window < 1 or delay < 1 or k < 1:
+        raise ValueError('Window {} with delay {} does not fit series length {}.'.format(window, delay, n))
+
+    step = ts.strides[-1]
+
+    shape = ts.shape[:-1] + (window, k)
+    strides = ts.strides[:-1] + (delay * step, step)
+
+    return np.lib.stride_tricks.as_strided(ts, shape=shape, strides=strides, writeable=False)
+
+
+def _hankel_weights(window, n):
+    """Number of elements on each antidiagonal of a trajectory matrix
+
+    Parameters
+    ----------
+    window : int
+        window length L of the trajectory matrix
+    n : int
+        series length N
+
+    Returns
+    -------
+    w : np.array
+        1d array of size n holding min(t + 1, L, K, N - t)
+
+    """
+
+    k = n - window + 1
+    t = np.arange(n)
+
+    return np.minimum(np.minimum(t + 1, n - t), min(window, k))
+
+
+def _wcorr(f, weights):
+    """Weighted correlation matrix of series
+
+    The weighted Gram matrix is computed with a single weighted matrix
+    product, then normalized by the weighted norms. Null series are
+    left uncorrelated.
+
+    Parameters
+    ----------
+    f : np.array
+        array of shape (r, N) holding one series per row
+    weights : np.array
+        weights of the inner product, of size N, see _hankel_weights
+
+    Returns
+    -------
+    wcorr : np.array
+        array of shape (r, r)
+
+    """
+
+    gram = np.dot(f * weights, f.T)
+
+    norm = np.sqrt(np.diag(gram))
+    norm[norm == 0] = 1.
+
+    return gram / np.outer(norm, norm)
+
+
+def _antidiagsum_rankone(u, v, collapse=False):
+    """Antidiagonal sums of the rank-one matrices u_i . v_i
+
+    The antidiagonal sums of an outer product are the full linear
+    convolution of both vectors. Convolutions are computed by FFT in
+    blocks of components to bound memory.
+
+    Parameters
+    ----------
+    u : np.array
+        left vectors of shape (L, r)
+    v : np.array
+        right vectors of shape (r, K)
+    collapse : bool, optional
+        If True, components are summed in the frequency domain and
+        a single series is returned.
+
+    Returns
+    -------
+    sums : np.array
+        array of shape (r, N), or (N,) if collapse is True, with
+        N = L + K - 1
+
+    """
+
+    u = np.asarray(u)
+    v = np.asarray(v)
+
+    l, r = u.shape
+    k = v.shape[1]
+    n = l + k - 1
+    nfft = _nextpow2(n)
+
+    block = max(1, _BLOCK_SIZE // nfft)
+
+    dtype = _floattype(u, v)
+
+    if collapse:
+        acc = np.zeros(nfft // 2 + 1, dtype=complex)
+    else:
+        sums = np.empty(shape=(r, n), dtype=dtype)
+
+    for i in range(0, r, block):
+        fu = np.fft.rfft(u[:, i:i + block], n=nfft, axis=0).T
+        fv = np.fft.rfft(v[i:i + block, :], n=nfft, axis=1)
+
+        if collapse:
+            acc += np.sum(fu * fv, axis=0)
+        else:
+            sums[i:i + block] = np.fft.irfft(fu * fv, n=nfft, axis=1)[:, :n]
+
+    if collapse:
+        return np.fft.irfft(acc, n=nfft)[:n].astype(dtype)
+
+    return sums
+
+
+def _diagavg_rankone(u, s, v, collapse=False):
+    """Diagonal averaging of the elementary matrices s_i . u_i . v_i
+
+    Parameters
+    ----------
+    u : np.array
+        left singular vectors of shape (L, r)
+    s : np.array
+        singular values of shape (r,)
+    v : np.array
+        right singular vectors of shape (r, K)
+    collapse : bool, optional
+        If True, the sum of the elementary series is returned.
+
+    Returns
+    -------
+    ts : np.array
+        elementary series of shape (r, N), or their sum of
+        shape (N,) if collapse is True
+
+    """
+
+    u = np.asarray(u) * np.asarray(s)
+    l = u.shape[0]
+    n = l + np.shape(v)[1] - 1
+
+    sums = _antidiagsum_rankone(u, v, collapse=collapse)
+
+    return sums / _hankel_weights(l, n).astype(sums.dtype)
+
+
+def _diagavg_rankone_stack(u, s, v):
+    """Diagonal averaging of the sum of elementary matrices of stacked series
+
+    Parameters
+    ----------
+    u : np.array
+        left singular vectors of shape (m, L, r)
+    s : np.array
+        singular values of shape (m, r)
+    v : np.array
+        right singular vectors of shape (m, r, K)
+
+    Returns
+    -------
+    ts : np.array
+        array of shape (m, N) holding, for each of the m series,
+        the series of the sum of its r elementary matrices
+
+    """
+
+    u = np.asarray(u) * np.asarray(s)[:, np.newaxis, :]
+    v = np.asarray(v)
+
+    m, l, r = u.shape
+    k = v.shape[2]
+    n = l + k - 1
+    nfft = _nextpow2(n)
+
+    block = max(1, _BLOCK_SIZE // (nfft * max(r, 1)))
+
+    ts = np.empty(shape=(m, n), dtype=_floattype(u, v))
+
+    for i in range(0, m, block):
+        fu = np.fft.rfft(u[i:i + block], n=nfft, axis=1)
+        fv = np.fft.rfft(v[i:i + block], n=nfft, axis=2)
+
+        # sum over components in the frequency domain
+
+        f = np.einsum('mfr,mrf->mf', fu, fv)
+        ts[i:i + block] = np.fft.irfft(f, n=nfft, axis=1)[:, :n]
+
+    return ts / _hankel_weights(l, n).astype(ts.dtype)
+
+
+def _diagavg(x):
+    """Diagonal averaging of a matrix
+
+    Parameters
+    ----------
+    x : array_like
+        matrix of shape (L, K)
+
+    Returns
+    -------
+    ts : np.array
+        1d array of size L + K - 1
+
+    """
+
+    x = np.asarray(x)
+    l, k = x.shape
+
+    # index of the antidiagonal of each matrix element
+
+    t = np.add.outer(np.arange(l), np.arange(k))
+
+    sums = np.bincount(t.ravel(), weights=x.ravel(), minlength=l + k - 1)
+
+    return (sums / _hankel_weights(l, l + k - 1)).astype(_floattype(x))
+
+
+def _hankel_fft(ts):
+    """Fourier transform of a series for Hankel matrix products
+
+    The transform size is the smallest power of two greater or equal
+    to the series length, which avoids circular aliasing on every
+    product computed by _hankel_matmat and _hankel_rmatmat whatever
+    the window length. It can thus be shared across windows.
+
+    Parameters
+    ----------
+    ts : array_like
+        the time series of length N
+
+    Returns
+    -------
+    fts : np.array
+        complex array of size nfft // 2 + 1
+
+    """
+
+    ts = np.asarray(ts)
+
+    return np.fft.rfft(ts, n=_nextpow2(len(ts)))
+
+
+def _hankel_product(fts, m, start, stop):
+    """Correlation of a series with the columns of m
+
+    Returns the rows start:stop of the full convolution of the
+    series with the reversed columns of m.
+    """
+
+    m = np.asarray(m)
+    vector = m.ndim == 1
+
+    if vector:
+        m = m[:, np.newaxis]
+
+    nfft = 2 * (len(fts) - 1)
+    p = m.shape[1]
+    block = max(1, _BLOCK_SIZE // nfft)
+
+    y = np.empty(shape=(stop - start, p), dtype=_floattype(m))
+
+    for i in range(0, p, block):
+        fm = np.fft.rfft(m[::-1, i:i + block], n=nfft, axis=0)
+        y[:, i:i + block] = np.fft.irfft(fts[:, np.newaxis] * fm, n=nfft, axis=0)[start:stop]
+
+    if vector:
+        y = y[:, 0]
+
+    return y
+
+
+def _hankel_matmat(fts, n, window, m):
+    """Product of the trajectory matrix X with m
+
+    The trajectory matrix is never formed: (X.m)_i = sum_j ts[i+j] m_j
+    is a correlation computed by FFT.
+
+    Parameters
+    ----------
+    fts : np.array
+        Fourier transform of the series, see _hankel_fft
+    n : int
+        series length N
+    window : int
+        window length L
+    m : np.array
+        array of shape (K,) or (K, p)
+
+    Returns
+    -------
+    y : np.array
+        array of shape (L,) or (L, p)
+
+    """
+
+    k = n - window + 1
+
+    return _hankel_product(fts, m, k - 1, n)
+
+
+def _hankel_rmatmat(fts, n, window, a):
+    """Product of the transposed trajectory matrix X' with a
+
+    Parameters
+    ----------
+    fts : np.array
+        Fourier transform of the series, see _hankel_fft
+    n : int
+        series length N
+    window : int
+        window length L
+    a : np.array
+        array of shape (L,) or (L, p)
+
+    Returns
+    -------
+    y : np.array
+        array of shape (K,) or (K, p)
+
+    """
+
+    return _hankel_product(fts, a, window - 1, n)
+
+
+def _lagproducts(ts, nlags):
+    """Lagged products of a series for all lags at once
+
+    Computes sum_t ts[t] . ts[t + k] for k in [0, nlags) by FFT in
+    O(N log N).
+
+    Parameters
+    ----------
+    ts : array_like
+        the time series of length N
+    nlags : int
+        number of lags, lower or equal to N
+
+    Returns
+    -------
+    r : np.array
+        1d array of size nlags
+
+    """
+
+    ts = np.asarray(ts, dtype=float)
+    nfft = _nextpow2(len(ts) + nlags)
+
+    fts = np.fft.rfft(ts, n=nfft)
+
+    return np.fft.irfft(fts * np.conj(fts), n=nfft)[:nlags]
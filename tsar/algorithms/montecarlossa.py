@@ -0,0 +1,205 @@
+"""Monte-Carlo Singular Spectrum Analysis significance test
+
+"""
+import numpy as np
+from scipy.signal import lfilter
+
+from tsar.algorithms.basicssa import BasicSsa
+from tsar.algorithms.hankel import _BLOCK_SIZE, _lagproducts, _nextpow2
+from tsar.algorithms.parallel import _poolmap
+
+
+def _ar1surrogates(gamma, alpha, shape, random_state):
+    """Stationary AR(1) surrogates generated by a recursive filter
+
+    Parameters
+    ----------
+    gamma : float
+        lag-1 autoregressive coefficient, in (-1, 1)
+    alpha : float
+        standard deviation of the innovations
+    shape : tuple
+        (number of surrogates, series length)
+    random_state : np.random.RandomState
+        random number generator
+
+    Returns
+    -------
+    x : np.array
+        surrogates of the given shape, one per row
+
+    """
+
+    e = alpha * random_state.standard_normal(shape)
+
+    # the first value is drawn from the stationary distribution
+
+    e[:, 0] /= np.sqrt(1. - gamma ** 2)
+
+    return lfilter([1.], [1., -gamma], e, axis=1)
+
+
+def _surrogatevalues(args):
+    """Projections of a batch of surrogates onto the data eigenbasis
+
+    The variance of a surrogate along the eigenvector u_j is
+    ||X_s' u_j||^2, where X_s is the trajectory matrix of the surrogate.
+    Products X_s' u are correlations computed by FFT, the transform of
+    the eigenvectors being shared by all surrogates.
+
+    Parameters
+    ----------
+    args : tuple
+        (seed, size, gamma, alpha, n, window, fu) where fu is the
+        Fourier transform of the reversed eigenvectors
+
+    Returns
+    -------
+    values : np.array
+        array of shape (size, r)
+
+    """
+
+    seed, size, gamma, alpha, n, window, fu = args
+
+    x = _ar1surrogates(gamma, alpha, (size, n), np.random.RandomState(seed))
+
+    nfft = 2 * (fu.shape[0] - 1)
+
+    fx = np.fft.rfft(x, n=nfft, axis=1)
+
+    z = np.fft.irfft(fx[:, :, np.newaxis] * fu[np.newaxis], n=nfft, axis=1)[:, window - 1:n]
+
+    return np.sum(z ** 2, axis=1)
+
+
+def montecarlossa(ts, window=None, n_components=10, n_surrogates=100, confidence=0.95,
+                  batchsize=None, n_jobs=None, random_state=None):
+    """Monte-Carlo SSA test of eigenvalues against red noise
+
+    The null hypothesis is a stationary AR(1) process whose parameters
+    are estimated from the centered series. Surrogates of the null
+    hypothesis are generated in batches by recursive filtering, then
+    projected onto the eigenvectors of the series trajectory matrix [1].
+    No decomposition of the surrogates is computed. Batches can be
+    processed in parallel over a process pool, results do not depend on
+    the number of processes.
+
+    Parameters
+    ----------
+    ts : 1d array_like
+        Array like holding the time series values.
+    window : int, optional
+        Window length L of the trajectory matrix. Default is half
+        the series length.
+    n_components : int, optional
+        Number of leading eigenvalues tested. Default is 10.
+    n_surrogates : int, optional
+        Number of surrogates. Default is 100.
+    confidence : float, optional
+        Confidence level of the bounds, in (0, 1). Default is 0.95.
+    batchsize : int, optional
+        Number of surrogates generated at once. Default is None, the
+        batch size is chosen to bound memory.
+    n_jobs : int, optional
+        Number of processes evaluating batches. Default is None,
+        batches are evaluated in the current process.
+    random_state : int, optional
+        Seed of the random number generator.
+
+    Returns
+    -------
+    mcssa : dict
+        Dictionary holding
+
+        'values'
+            leading eigenvalues of the series, ie. squared singular
+            values of its trajectory matrix
+        'lower', 'upper'
+            bounds of the two sided confidence interval of each
+            eigenvalue under the null hypothesis
+        'significant'
+            boolean array, True where an eigenvalue is above its upper
+            bound
+        'surrogates'
+            array of shape (n_surrogates, n_components), projections of
+            the surrogates onto the eigenvectors
+        'ar1'
+            estimated (gamma, alpha) parameters of the AR(1) process
+
+    Examples
+    --------
+
+    The trend of the co2 series is not distinguished from red noise,
+    seasonal components are.
+
+    >>> mcssa = montecarlossa(co2, window=120, n_components=6, n_surrogates=500, random_state=0)
+    >>> mcssa['significant']
+    array([False, False,  True,  True,  True,  True])
+
+    References
+    ----------
+
+    [1] Allen, M. R., and Smith, L. A. "Monte Carlo SSA: Detecting Irregular
+    Oscillations in the Presence of Colored Noise." Journal of Climate 9,
+    no. 12 (1996): 3373-3404.
+
+    """
+
+    ts = np.asarray(ts, dtype=float)
+
+    if ts.ndim != 1:
+        raise TypeError('Input object should be 1 dimensional numeric array like object.')
+
+    if not 0 < confidence < 1:
+        raise ValueError('confidence should be in range (0, 1).')
+
+    ts = ts - ts.mean()
+    n = len(ts)
+
+    # AR(1) parameters from lag-0 and lag-1 products
+
+    r = _lagproducts(ts, 2)
+
+    gamma = np.clip(r[1] / r[0], -0.999, 0.999)
+    alpha = np.sqrt(r[0] / n * (1. - gamma ** 2))
+
+    # eigenbasis of the series
+
+    ssa = BasicSsa(ts, window=window, n_components=n_components, tstype=np.array)
+
+    u, s, _ = ssa.svd
+    window = ssa.window
+
+    nfft = _nextpow2(n)
+    fu = np.fft.rfft(u[::-1], n=nfft, axis=0)
+
+    # batches bounded to _BLOCK_SIZE values of transforms
+
+    if batchsize is None:
+        batchsize = max(1, _BLOCK_SIZE // (nfft * u.shape[1]))
+
+    sizes = [min(batchsize, n_surrogates - i) for i in range(0, n_surrogates, batchsize)]
+    seeds = np.random.RandomState(random_state).randint(0, 2 ** 31 - 1, size=len(sizes))
+
+    tasks = [(seed, size, gamma, alpha, n, window, fu) for seed, size in zip(seeds, sizes)]
+
+    results = _poolmap(_surrogatevalues, tasks, n_jobs=n_jobs)
+
+    surrogates = np.concatenate(results, axis=0)
+
+    tail = 50. * (1. - confidence)
+    lower, upper = np.percentile(surrogates, [tail, 100. - tail], axis=0)
+
+    values = s ** 2
+
+    mcssa = {
+        'values': values,
+        'lower': lower,
+        'upper': upper,
+        'significant': values > upper,
+        'surrogates': surrogates,
+        'ar1': (gamma, alpha),
+    }
+
+    return mcssa
@@ -0,0 +1,229 @@
+"""Multichannel Singular Spectrum Analysis with numpy
+
+"""
+import numpy as np
+import pandas as pd
+
+from tsar.algorithms.basicssa import BasicSsa
+from tsar.algorithms.hankel import _diagavg_rankone_stack, _embed, _hankel_weights
+from tsar.algorithms.hankel import _hankel_fft, _hankel_matmat, _hankel_rmatmat
+
+
+class MultichannelSsa(BasicSsa):
+    """A class for multichannel Singular Spectrum Analysis
+
+    Multichannel SSA (MSSA) decomposes several series of same length
+    jointly. The trajectory matrices of the M channels are stacked into
+    the block-Hankel matrix X = [X_1 : ... : X_M] of shape (L, M.K), and
+    a single singular value decomposition is shared by all channels:
+    left singular vectors are common and right singular vectors are
+    split into one block per channel.
+
+    Components are never materialized as block matrices. Channel series
+    are reconstructed by FFT convolution of the singular vectors and the
+    truncated solvers only access X through FFT based products, so a
+    joint decomposition costs about one SVD.
+
+    The reconstruction, w-correlation, forecast and save and load
+    interface mirrors BasicSsa. All channels share the left singular
+    vectors, so that they are forecast with the same recurrence.
+
+    Parameters
+    ----------
+    data : 2d array_like
+        Array of shape (N, M) or pd.DataFrame holding one channel per
+        column.
+    window : int, optional
+        Window length L of the trajectory matrices. Default is half
+        the series length.
+    n_components : int, optional
+        Number of leading eigentriples to compute. Default is None,
+        all eigentriples are computed.
+    solver : str, optional
+        Singular value decomposition solver, one of 'auto', 'full',
+        'randomized' or 'arpack'. See BasicSsa. Default is 'auto'.
+    dtype : dtype, optional
+        Floating point type of the decomposition. Default is np.float64.
+
+    Examples
+    --------
+
+    >>> lorenz = tsar.datasets.lorenz()
+    >>> mssa = MultichannelSsa(lorenz, window=200, n_components=20)
+    >>> mssa.reconstruct({'Trend': [0], 'Oscillations': [1, 2]})
+    >>> mssa['Oscillations'].columns.tolist()
+    ['x', 'y', 'z']
+    >>> mssa.plot('wcorr', n=20)
+
+    References
+    ----------
+
+    [1] Golyandina, Nina, Anton Korobeynikov, Alex Shlemov, and Konstantin
+    Usevich. "Multivariate and 2D Extensions of Singular Spectrum Analysis
+    with the Rssa Package." Journal of Statistical Software 67, no. 2 (2015).
+
+    """
+
+    def __init__(self, data, window=None, n_components=None, solver='auto', dtype=np.float64):
+
+        # keep labels of pandas inputs
+
+        if isinstance(data, pd.DataFrame):
+            self._index = data.index
+            self._columns = data.columns
+        else:
+            self._index = None
+            self._columns = None
+
+        data = np.asarray(data, dtype=dtype)
+
+        if data.ndim != 2:
+            raise TypeError('Input object should be 2 dimensional numeric array like object.')
+
+        # channels are stored one per row
+
+        self.ts = np.ascontiguousarray(data.T)
+        self.tstype = None
+        self._m, self._n = self.ts.shape
+
+        self._groupidx = dict()
+
+        if window is None:
+            window = self._n // 2
+
+        self.window = window
+        self._k = self._n - self.window + 1
+
+        self._dmax = min(self.window, self._m * self._k)
+
+        self._setsolver(n_components, solver)
+
+        self._x = self._embedseries()
+
+        self._groupidx['Original'] = None
+
+        self.svd = [None, None, None]
+
+        self._decompose()
+
+    def __getitem__(self, item):
+        ts = self._getseries(item)
+
+        if self._columns is not None:
+            return pd.DataFrame(ts.T, index=self._index, columns=self._columns)
+
+        return ts.T
+
+    # --------------------------------------------------------
+    # Private methods
+
+    def _forecastseries(self, values):
+        """Forecasts of the channels, one per column"""
+
+        if self._columns is not None:
+            return pd.DataFrame(values.T, columns=self._columns)
+
+        return values.T
+
+    def _savestate(self, meta, arrays):
+        """Save the labels of pandas inputs
+
+        Labels that are not numbers or dates are stored as strings.
+
+        """
+
+        meta['labels'] = self._columns is not None
+
+        if meta['labels']:
+            arrays['index'] = _labelarray(self._index)
+            arrays['columns'] = _labelarray(self._columns)
+
+    def _loadstate(self, meta, arrays):
+        """Set the number of channels and the labels of pandas inputs"""
+
+        self._m = self.ts.shape[0]
+        self.tstype = None
+
+        if meta['labels']:
+            self._index = pd.Index(np.array(arrays['index']))
+            self._columns = pd.Index(np.array(arrays['columns']))
+        else:
+            self._index = None
+            self._columns = None
+
+    def _embedseries(self):
+        """Embed channels into the block-Hankel trajectory matrix
+
+        Returns
+        -------
+        x : np.array
+            the stacked trajectory matrix of size (window, M.k) for the
+            full solver, the read-only stack of channel trajectory
+            matrices of size (M, window, k) otherwise
+
+        """
+
+        x = _embed(self.ts, self.window)
+
+        if self.solver == 'full':
+            return np.concatenate(x, axis=1)
+
+        return x
+
+    def _hankelproducts(self):
+        """FFT based products with the block-Hankel trajectory matrix"""
+
+        n = self._n
+        w = self.window
+        k = self._k
+        m = self._m
+
+        fts = [_hankel_fft(ts) for ts in self.ts]
+
+        def matmat(x):
+            return sum(_hankel_matmat(f, n, w, x[i * k:(i + 1) * k]) for i, f in enumerate(fts))
+
+        def rmatmat(a):
+            return np.concatenate([_hankel_rmatmat(f, n, w, a) for f in fts], axis=0)
+
+        return matmat, rmatmat, (w, m * k)
+
+    def _componentseries(self, idx):
+        """Elementary series of a set of components
+
+        Channels are concatenated so that the weighted inner product
+        of two multichannel series is the sum of the weighted inner
+        products of their channels.
+
+        Returns
+        -------
+        f : np.array
+            array of shape (len(idx), M.N)
+
+        """
+
+        u, s, v = self.svd
+        m, k, l = self._m, self._k, self.window
+        c = len(idx)
+
+        uc = np.repeat(u[:, idx].T, m, axis=0)[:, :, np.newaxis]
+        sc = np.repeat(s[idx], m)[:, np.newaxis]
+        vc = v[idx, :].reshape(c * m, 1, k)
+
+        return _diagavg_rankone_stack(uc, sc, vc).reshape(c, m * self._n)
+
+    def _wcorrweights(self):
+        """Weights of the w-correlation inner product, tiled over channels"""
+
+        return np.tile(_hankel_weights(self.window, self._n), self._m).astype(self.ts.dtype)
+
+
+def _labelarray(labels):
+    """Array of index labels storable without pickling"""
+
+    values = np.asarray(labels)
+
+    if values.dtype.hasobject:
+        values = np.array([u'{}'.format(x) for x in values])
+
+    return values
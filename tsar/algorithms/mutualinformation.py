@@ -120,6 +120,97 @@ def _compute_mi_binned(x, y, bins='sqrt', logfunc=np.log):
 
     return mi.sum()
 
+
+def _compute_ami_binned(ts, maxlag, bins='sqrt', logfunc=np.log):
+    """Computes binned Mutual Information between a series and its lags
+
+    The series is quantized once into integer bin codes, bin edges being
+    computed from the whole series. The joint histogram of each lag is
+    then a single bincount of the combined codes of the pairs, and the
+    mutual information is computed from a table of c.log(c) for all
+    possible counts c.
+
+    Parameters
+    ----------
+    ts : np.array
+        the time series of length N
+    maxlag : int
+        maximum lag, lower than N
+    bins : int or sequence of scalars or str, optional
+        bins of the series, see _compute_mi_binned. Values outside of
+        the bin edges are ignored.
+    logfunc : function
+        logarithm function to use.
+
+    Returns
+    -------
+    np.array
+        array of size maxlag + 1 holding the binned mutual information
+        between the series and each of its lags
+
+    Examples
+    --------
+    >>> x = tsar.datasets.lorenz()['x'].values
+    >>> ami = _compute_ami_binned(x, maxlag=2)
+    >>> print ami
+    [4.43577709 3.05675026 2.57013221]
+
+    """
+
+    ts = np.asarray(ts, dtype=float)
+    n = len(ts)
+
+    edges = np.histogram_bin_edges(ts, bins=bins)
+    nbins = len(edges) - 1
+
+    # integer bin codes, the last bin includes its right edge as in
+    # np.histogram, values out of the edges get an extra code which is
+    # left out of the joint histograms
+
+    codes = np.searchsorted(edges, ts, side='right') - 1
+    codes[ts == edges[-1]] = nbins - 1
+
+    outside = (ts < edges[0]) | (ts > edges[-1])
+    codes[outside] = nbins
+
+    ncodes = nbins + 1 if outside.any() else nbins
+
+    # table of c.log(c) for all possible counts, 0.log(0) being 0
+
+    counts = np.arange(n + 1, dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        xlogx = counts * logfunc(counts)
+
+    xlogx[0] = 0.
+
+    # MI = (sum c.log c - sum a.log a - sum b.log b) / n + log n where c,
+    # a and b are the joint and marginal counts of the n pairs
+
+    scaled = codes * ncodes
+
+    ami = np.zeros(maxlag + 1)
+
+    for lag in range(maxlag + 1):
+
+        combined = scaled[lag:] + codes[:n - lag]
+
+        joint = np.bincount(combined, minlength=ncodes * ncodes).reshape(ncodes, ncodes)[:nbins, :nbins]
+
+        px = joint.sum(axis=1)
+        py = joint.sum(axis=0)
+        total = px.sum()
+
+        if total == 0:
+            continue
+
+        hxy = xlogx[joint].sum() - xlogx[px].sum() - xlogx[py].sum()
+
+        ami[lag] = hxy / total + logfunc(total)
+
+    return ami
+
+
 if __name__ == '__main__':
     import doctest
     doctest.testmod()
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""Storage of arrays in uncompressed .npz archives with memory mapping
+
+np.load does not memory-map the members of a .npz archive. Archives
+written by np.savez are uncompressed zip files, so each member is a
+contiguous .npy file inside the archive and can be memory-mapped at
+its offset.
+
+"""
+import struct
+import zipfile
+
+import numpy as np
+
+
+def _savenpz(path, **arrays):
+    """Save arrays into an uncompressed .npz archive
+
+    Parameters
+    ----------
+    path : str
+        file path, written as is (no extension is appended)
+    arrays : np.array
+        arrays stored by name
+
+    """
+
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+def _memmapmember(f, info):
+    """Memory map a stored member of an opened zip archive, or None"""
+
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+
+    # data starts after the local file header: 30 bytes followed by the
+    # file name and the extra field, whose lengths are stored at 26 and 28
+
+    f.seek(info.header_offset)
+    header = f.read(30)
+    fnlen, extralen = struct.unpack('<HH', header[26:30])
+
+    f.seek(info.header_offset + 30 + fnlen + extralen)
+
+    version = np.lib.format.read_magic(f)
+
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+    # object arrays and empty or scalar arrays are read in memory
+
+    if dtype.hasobject or len(shape) == 0 or 0 in shape:
+        return None
+
+    order = 'F' if fortran_order else 'C'
+
+    return np.memmap(f.name, dtype=dtype, mode='r', offset=f.tell(), shape=shape, order=order)
+
+
+def _loadnpz(path, mmap=True):
+    """Load arrays from a .npz archive
+
+    Parameters
+    ----------
+    path : str
+        file path
+    mmap : bool, optional
+        If True, uncompressed members are memory-mapped in read-only
+        mode, other members are read in memory. Default is True.
+
+    Returns
+    -------
+    arrays : dict
+        arrays by name
+
+    """
+
+    arrays = dict()
+
+    with np.load(path, allow_pickle=False) as npz:
+
+        if not mmap:
+            return dict((name, npz[name]) for name in npz.files)
+
+        with open(path, 'rb') as f:
+
+            for info in npz.zip.infolist():
+
+                name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+                array = _memmapmember(f, info)
+
+                arrays[name] = npz[name] if array is None else array
+
+    return arrays
@@ -0,0 +1,185 @@
+"""Out-of-core Singular Spectrum Analysis with numpy
+
+"""
+import numpy as np
+import scipy.linalg
+
+from tsar.algorithms.hankel import _antidiagsum_rankone, _embed
+
+# maximum number of trajectory matrix elements held in memory by a
+# chunk of lagged vectors (8 bytes each, ie. about 64 Mb)
+
+_CHUNK_ELEMENTS = 2 ** 23
+
+
+class OutOfCoreSsa(object):
+    """A class for out-of-core Singular Spectrum Analysis
+
+    Series larger than memory are read chunk by chunk, typically from a
+    memory-mapped .npy file. The (L, L) lag-covariance matrix S = X.X' is
+    accumulated over chunks of lagged vectors and eigendecomposed, its
+    eigenvectors being the left singular vectors of the trajectory
+    matrix. Reconstructed groups are then streamed back chunk by chunk,
+    optionally to a memory-mapped .npy file.
+
+    Peak memory is bounded by the window length and the chunk size,
+    not by the series length.
+
+    Parameters
+    ----------
+    ts : str or 1d array_like
+        Path to a .npy file holding the series, memory-mapped in read
+        only mode, or array like holding the time series values. Arrays
+        are not copied, so np.memmap objects are read chunk by chunk.
+    window : int
+        Window length L of the trajectory matrix.
+    n_components : int, optional
+        Number of leading eigentriples to compute. Default is None,
+        all eigentriples are computed.
+    chunksize : int, optional
+        Number of lagged vectors read at once. Default is chosen so
+        that a chunk holds about 8M trajectory matrix elements.
+
+    Examples
+    --------
+
+    >>> ssa = OutOfCoreSsa('series.npy', window=1000, n_components=20)
+    >>> out = ssa.reconstruct({'Trend': [0], 'Season': [1, 2]}, path='groups.npy')
+    >>> out['Trend'][:10]
+
+    """
+
+    def __init__(self, ts, window, n_components=None, chunksize=None):
+
+        # a file path is memory-mapped
+
+        if np.ndim(ts) == 0:
+            ts = np.load(ts, mmap_mode='r')
+
+        if np.ndim(ts) != 1:
+            raise TypeError('Input object should be 1 dimensional numeric array like object.')
+
+        self.ts = ts
+        self._n = len(ts)
+        self.window = window
+        self._k = self._n - window + 1
+
+        if window < 1 or self._k < 1:
+            raise ValueError('Window {} does not fit series length {}.'.format(window, self._n))
+
+        if n_components is not None and not 0 < n_components <= window:
+            raise ValueError('n_components should be in range [1, {}].'.format(window))
+
+        self.n_components = window if n_components is None else n_components
+
+        if chunksize is None:
+            chunksize = max(1, _CHUNK_ELEMENTS // window)
+
+        self.chunksize = chunksize
+
+        self._decompose()
+
+    # --------------------------------------------------------
+    # Public methods
+
+    def reconstruct(self, groups, path=None):
+        """Stream reconstructed groups chunk by chunk
+
+        Parameters
+        ----------
+        groups : dict
+            group names mapped to lists of component indexes
+        path : str, optional
+            path of a .npy file receiving an array of shape
+            (len(groups) + 1, N), the last row holding the residuals.
+            Default is None, the array is held in memory.
+
+        Returns
+        -------
+        series : dict
+            group names, and 'Residuals', mapped to the reconstructed
+            series (rows of a np.memmap if path is given)
+
+        """
+
+        names = list(groups.keys())
+        idx_list = [list(groups[name]) for name in names]
+
+        if not set(ix for sublist in idx_list for ix in sublist).issubset(range(self.n_components)):
+            raise IndexError('Components are out of range.')
+
+        n, w, k = self._n, self.window, self._k
+        ng = len(names)
+
+        if path is None:
+            out = np.empty(shape=(ng + 1, n))
+        else:
+            out = np.lib.format.open_memmap(path, mode='w+', dtype=float, shape=(ng + 1, n))
+
+        u = self.svd[0]
+
+        # antidiagonal sums of the last window - 1 positions of a chunk
+        # are completed by the next chunk
+
+        carry = np.zeros(shape=(ng, w - 1))
+
+        for j0 in range(0, k, self.chunksize):
+
+            m = min(self.chunksize, k - j0)
+            seg = np.asarray(self.ts[j0:j0 + m + w - 1], dtype=float)
+            x = _embed(seg, w)
+
+            sums = np.empty(shape=(ng, m + w - 1))
+
+            for i, idx in enumerate(idx_list):
+                a = np.dot(u[:, idx].T, x)
+                sums[i] = _antidiagsum_rankone(u[:, idx], a, collapse=True)
+
+            sums[:, :w - 1] += carry
+
+            # positions completed by this chunk, all of them for the last one
+
+            stop = m if j0 + m < k else m + w - 1
+
+            t = np.arange(j0, j0 + stop)
+            weights = np.minimum(np.minimum(t + 1, n - t), min(w, k))
+
+            out[:ng, j0:j0 + stop] = sums[:, :stop] / weights
+            out[ng, j0:j0 + stop] = seg[:stop] - np.sum(out[:ng, j0:j0 + stop], axis=0)
+
+            carry = sums[:, m:]
+
+        if path is not None:
+            out.flush()
+
+        return dict(zip(names + ['Residuals'], out))
+
+    # --------------------------------------------------------
+    # Private methods
+
+    def _decompose(self):
+        """Eigendecomposition of the chunk-wise accumulated lag-covariance"""
+
+        w = self.window
+        r = self.n_components
+
+        s = np.zeros(shape=(w, w))
+
+        for j0 in range(0, self._k, self.chunksize):
+
+            m = min(self.chunksize, self._k - j0)
+            seg = np.asarray(self.ts[j0:j0 + m + w - 1], dtype=float)
+            x = _embed(seg, w)
+
+            s += np.dot(x, x.T)
+
+        evals, u = scipy.linalg.eigh(s, eigvals=(w - r, w - 1))
+
+        # eigenpairs sorted by decreasing eigenvalue
+
+        evals = np.clip(evals[::-1], 0., None)
+        u = u[:, ::-1]
+
+        # right singular vectors are not stored
+
+        self.svd = [u, np.sqrt(evals), None]
@@ -0,0 +1,196 @@
+"""Batched Singular Spectrum Analysis of a panel of series
+
+"""
+import numpy as np
+import pandas as pd
+
+from tsar.algorithms.hankel import _diagavg_rankone_stack, _embed
+from tsar.algorithms.parallel import _poolmap
+
+# maximum number of trajectory matrix elements decomposed at once
+# (8 bytes each, ie. about 256 Mb)
+
+_BATCH_ELEMENTS = 2 ** 25
+
+
+def _batchsvd(args):
+    """Batched singular value decomposition of stacked trajectory matrices
+
+    Parameters
+    ----------
+    args : tuple
+        (data, window, n_components) where data is an array of shape
+        (m, N) holding one series per row
+
+    Returns
+    -------
+    u, s, v : np.array
+        stacked singular triples of shape (m, L, r), (m, r), (m, r, K)
+
+    """
+
+    data, window, r = args
+
+    x = _embed(data, window)
+
+    u, s, v = np.linalg.svd(x, full_matrices=False)
+
+    return u[:, :, :r], s[:, :r], v[:, :r, :]
+
+
+class PanelSsa(object):
+    """A class for batched Singular Spectrum Analysis of a panel of series
+
+    All series of the panel share the same length and window. They are
+    validated and embedded once, their trajectory matrices are stacked
+    and decomposed with a batched singular value decomposition, and groups
+    are reconstructed for all series at once.
+
+    Parameters
+    ----------
+    data : 2d array_like
+        Array of shape (N, m) or pd.DataFrame holding one series per
+        column.
+    window : int, optional
+        Window length L of the trajectory matrices. Default is half
+        the series length.
+    n_components : int, optional
+        Number of leading eigentriples kept for each series. Default is
+        None, all eigentriples are kept.
+    n_jobs : int, optional
+        Number of processes decomposing blocks of series. Default is
+        None, blocks are decomposed in the current process.
+
+    Examples
+    --------
+
+    >>> lorenz = tsar.datasets.lorenz()
+    >>> panel = PanelSsa(lorenz, window=100, n_components=10)
+    >>> panel.reconstruct({'Trend': [0], 'Oscillations': [1, 2]})
+    >>> panel.groups
+    ['Original', 'Oscillations', 'Trend', 'Residuals']
+    >>> panel['Trend'].columns.tolist()
+    ['x', 'y', 'z']
+
+    """
+
+    def __init__(self, data, window=None, n_components=None, n_jobs=None):
+
+        # keep labels of pandas inputs
+
+        if isinstance(data, pd.DataFrame):
+            self._index = data.index
+            self._columns = data.columns
+        else:
+            self._index = None
+            self._columns = None
+
+        data = np.asarray(data, dtype=float)
+
+        if data.ndim != 2:
+            raise TypeError('Input object should be 2 dimensional numeric array like object.')
+
+        # series are stored one per row
+
+        self.data = np.ascontiguousarray(data.T)
+        self._m, self._n = self.data.shape
+
+        if window is None:
+            window = self._n // 2
+
+        self.window = window
+        self._k = self._n - window + 1
+
+        d = min(window, self._k)
+
+        if n_components is not None and not 0 < n_components <= d:
+            raise ValueError('n_components should be in range [1, {}].'.format(d))
+
+        self.n_components = d if n_components is None else n_components
+        self.n_jobs = n_jobs
+
+        self._groupidx = dict()
+        self._grouped = []
+
+        self._decompose()
+
+    def __getitem__(self, item):
+        ts = self._getseries(item)
+
+        if self._columns is not None:
+            return pd.DataFrame(ts.T, index=self._index, columns=self._columns)
+
+        return ts.T
+
+    # --------------------------------------------------------
+    # Properties
+
+    @property
+    def groups(self):
+        """List of reconstructed group names"""
+
+        others = sorted(n for n in self._groupidx.keys() if n != 'Residuals')
+        last = ['Residuals'] if 'Residuals' in self._groupidx else []
+
+        return ['Original'] + others + last
+
+    # --------------------------------------------------------
+    # Public methods
+
+    def reconstruct(self, groups):
+        """Define groups of components, shared by all series
+
+        Parameters
+        ----------
+        groups : dict
+            group names mapped to lists of component indexes
+
+        """
+
+        idx_list = [list(i) for i in groups.values()]
+        all_grp_idx = [ix for sublist in idx_list for ix in sublist]
+
+        if not set(all_grp_idx).issubset(range(self.n_components)):
+            raise IndexError('Components are out of range.')
+
+        for name, idx_grp in zip(groups.keys(), idx_list):
+            self._groupidx[name] = idx_grp
+
+        self._grouped = sorted(set(all_grp_idx))
+        self._groupidx['Residuals'] = [ix for ix in range(self.n_components) if ix not in all_grp_idx]
+
+    # --------------------------------------------------------
+    # Private methods
+
+    def _decompose(self):
+        """Batched singular value decomposition of blocks of series"""
+
+        w = self.window
+        r = self.n_components
+
+        block = max(1, _BATCH_ELEMENTS // (w * self._k))
+        tasks = [(self.data[i:i + block], w, r) for i in range(0, self._m, block)]
+
+        results = _poolmap(_batchsvd, tasks, n_jobs=self.n_jobs)
+
+        u, s, v = [np.concatenate(a, axis=0) for a in zip(*results)]
+
+        self.svd = [u, s, v]
+
+    def _getseries(self, name):
+        """Series of a group for all series, of shape (m, N)"""
+
+        if name == 'Original':
+            return self.data.copy()
+
+        if name == 'Residuals':
+            return self.data - self._getcomponents(self._grouped)
+
+        return self._getcomponents(self._groupidx[name])
+
+    def _getcomponents(self, idx):
+        """Sum of the series of a set of components for all series"""
+
+        u, s, v = self.svd
+
+        return _diagavg_rankone_stack(u[:, :, idx], s[:, idx], v[:, idx, :])
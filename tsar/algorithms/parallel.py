@@ -0,0 +1,55 @@
+"""Evaluation of independent tasks over process or thread pools
+
+"""
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+
+
+def _poolimap(func, tasks, n_jobs=None, threads=False):
+    """Apply a function to tasks, in a pool of workers if requested
+
+    Results are yielded in the order of the tasks as soon as they are
+    available, so that they can be consumed while the next tasks are
+    evaluated. The pool is closed and joined when the results are
+    exhausted or the generator is closed.
+
+    Parameters
+    ----------
+    func : function
+        function of one task, picklable for a process pool
+    tasks : list
+        arguments of func
+    n_jobs : int, optional
+        Number of workers. Default is None, tasks are evaluated in the
+        current process. A single task is always evaluated in the
+        current process.
+    threads : bool, optional
+        If True, workers are threads sharing the memory of the current
+        process, otherwise processes. Default is False.
+
+    Yields
+    ------
+    result : object
+        func(task) for each task
+
+    """
+
+    if n_jobs is None or len(tasks) < 2:
+        for task in tasks:
+            yield func(task)
+        return
+
+    pool = ThreadPool(n_jobs) if threads else multiprocessing.Pool(n_jobs)
+
+    try:
+        for result in pool.imap(func, tasks):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _poolmap(func, tasks, n_jobs=None, threads=False):
+    """List of the results of a function applied to tasks, see _poolimap"""
+
+    return list(_poolimap(func, tasks, n_jobs=n_jobs, threads=threads))
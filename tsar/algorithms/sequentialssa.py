@@ -0,0 +1,287 @@
+"""Sequential Singular Spectrum Analysis with numpy
+
+"""
+import warnings
+
+import numpy as np
+
+from tsar.algorithms.forecast import _prefixtails
+from tsar.algorithms.hankel import _embed
+
+try:
+    import pandas as pd
+
+    __TS_DEFAULT_TYPE__ = pd.Series
+except:
+    warnings.warn('pandas module missing: __TS__DEFAULT_TYPE__ set to np.array')
+    __TS_DEFAULT_TYPE__ = np.array
+
+
+class SequentialSsa(object):
+    """A class for sequential Singular Spectrum Analysis
+
+    Sequential SSA tracks the leading eigentriples of a growing
+    time series. New samples are appended to the series and the
+    decomposition is updated with low-rank updates of the lag-covariance
+    eigenpairs, instead of recomputing a full singular value
+    decomposition.
+
+    Each appended sample adds a lagged vector c to the trajectory matrix,
+    ie. a rank-one term c.c' to the lag-covariance matrix S = X.X'. Over
+    a fixed length segment, the oldest lagged vector is removed as well.
+    The updated eigenpairs are obtained by projecting S on the subspace
+    spanned by the current eigenvectors and the added and removed
+    lagged vectors, so that each update costs O(L.r^2) where r is the
+    number of tracked eigentriples.
+
+    Memory is bounded for an unbounded stream: only the r eigenpairs
+    and the last maxlen samples (or 2.window - 1 samples for an
+    expanding segment) are kept.
+
+    Item access returns the reconstruction of the last window samples
+    of the segment by the current eigenvectors.
+
+    Parameters
+    ----------
+    window : int
+        Window length L of the trajectory matrix.
+    n_components : int, optional
+        Number r of tracked eigentriples. Default is 10.
+    maxlen : int, optional
+        Length of the analysed segment. If None, the segment expands
+        with the series. Default is None.
+    tstype : type, optional
+        Type of the series returned by item access. Default is
+        pd.Series if pandas is available, np.array otherwise.
+
+    Examples
+    --------
+
+    >>> ssa = SequentialSsa(window=24, n_components=6, maxlen=240)
+    >>> ssa.append(co2.values[:240])
+    >>> ssa.reconstruct({'Trend': [0], 'Season': [1, 2]})
+    >>> for value in co2.values[240:]:
+    ...     ssa.append(value)
+    >>> trend = ssa['Trend']
+
+    Notes
+    -----
+
+    Eigenpairs discarded by the truncation are lost: when lagged vectors
+    are removed from a fixed length segment, their part outside of the
+    tracked subspace cannot be downdated. Tracked eigenvalues are thus
+    approximate, the approximation being tight when the r leading
+    eigenvalues dominate the spectrum.
+
+    """
+
+    def __init__(self, window, n_components=10, maxlen=None, tstype=__TS_DEFAULT_TYPE__):
+
+        if maxlen is not None and maxlen < window:
+            raise ValueError('maxlen {} should be greater or equal to window {}.'.format(maxlen, window))
+
+        self.window = window
+        self.n_components = min(n_components, window)
+        self.maxlen = maxlen
+        self.tstype = tstype
+
+        # last samples of the series, enough to build the new lagged
+        # vectors, the removed ones and the last window lagged vectors
+        # of the reconstruction
+
+        self._history = np.zeros(0)
+
+        # number of samples seen
+
+        self._count = 0
+
+        # tracked eigenpairs of the lag-covariance matrix
+
+        self._u = np.zeros(shape=(window, 0))
+        self._lambda = np.zeros(0)
+
+        # groups are stored as lists of component indexes
+
+        self._groupidx = dict()
+
+    def __getitem__(self, item):
+        ts = self._getseries(item)
+        return self.tstype(ts)
+
+    def __len__(self):
+        return self._count
+
+    # --------------------------------------------------------
+    # Properties
+
+    @property
+    def svd(self):
+        """Tracked left singular vectors and singular values
+
+        Right singular vectors are not tracked and set to None.
+
+        """
+
+        return [self._u, np.sqrt(self._lambda), None]
+
+    @property
+    def groups(self):
+        """List of reconstructed group names"""
+
+        return ['Original'] + sorted(self._groupidx.keys())
+
+    # --------------------------------------------------------
+    # Public methods
+
+    def append(self, values):
+        """Append samples and update the decomposition
+
+        Parameters
+        ----------
+        values : scalar or 1d array_like
+            new samples of the series
+
+        """
+
+        values = np.atleast_1d(np.asarray(values, dtype=float))
+
+        if values.ndim != 1:
+            raise TypeError('Input object should be a scalar or a 1 dimensional numeric array like object.')
+
+        w = self.window
+
+        # updates are processed in blocks of at most window lagged
+        # vectors to bound the size of the projected problem
+
+        for i in range(0, len(values), w):
+            self._update(values[i:i + w])
+
+    def reconstruct(self, groups):
+        """Define groups of tracked components
+
+        Parameters
+        ----------
+        groups : dict
+            group names mapped to lists of component indexes
+
+        """
+
+        idx_list = [list(i) for i in groups.values()]
+
+        if not set(ix for sublist in idx_list for ix in sublist).issubset(range(self.n_components)):
+            raise IndexError('Components are out of range.')
+
+        for name, idx_grp in zip(groups.keys(), idx_list):
+            self._groupidx[name] = idx_grp
+
+    # --------------------------------------------------------
+    # Private methods
+
+    def _update(self, values):
+        """Low-rank update of the eigenpairs with a block of samples"""
+
+        w = self.window
+        m = len(values)
+
+        series = np.concatenate([self._history, values])
+        start = self._count - len(self._history)
+        self._count += m
+
+        # lagged vectors ending on the new samples
+
+        first = max(self._count - m, w - 1) - start - w + 1
+        ncols = len(series) - w + 1 - first
+
+        if ncols <= 0:
+            self._trimhistory(series)
+            return
+
+        x = _embed(series, w)
+        added = x[:, first:]
+
+        # lagged vectors leaving a fixed length segment
+
+        removed = None
+
+        if self.maxlen is not None:
+            k = self.maxlen - w + 1
+            before = max(0, self._count - m - w + 1)
+            nremoved = max(0, min(k, before) + ncols - k)
+
+            if nremoved > 0:
+                oldest = max(0, before - k) - start
+                removed = x[:, oldest:oldest + nremoved]
+
+        self._lowrankupdate(added, removed)
+        self._trimhistory(series)
+
+    def _lowrankupdate(self, added, removed):
+        """Eigenpairs of U.diag(lambda).U' + A.A' - B.B' truncated to rank r"""
+
+        u = self._u
+        lam = self._lambda
+
+        blocks = [u, added] if removed is None else [u, added, removed]
+
+        q = np.linalg.qr(np.hstack(blocks))[0]
+
+        # projection of the updated lag-covariance on span(q)
+
+        qu = np.dot(q.T, u)
+        qa = np.dot(q.T, added)
+
+        m = np.dot(qu * lam, qu.T) + np.dot(qa, qa.T)
+
+        if removed is not None:
+            qb = np.dot(q.T, removed)
+            m -= np.dot(qb, qb.T)
+
+        evals, evecs = np.linalg.eigh(m)
+
+        # eigenpairs sorted by decreasing eigenvalue, truncated to rank r
+
+        order = np.argsort(evals)[::-1][:self.n_components]
+
+        self._lambda = np.clip(evals[order], 0., None)
+        self._u = np.dot(q, evecs[:, order])
+
+    def _trimhistory(self, series):
+        """Keep the samples needed by the next updates"""
+
+        size = 2 * self.window - 1 if self.maxlen is None else self.maxlen
+
+        self._history = series[len(series) - size:] if len(series) > size else series
+
+    def _getseries(self, name):
+        """Reconstruction of the last window samples of the segment
+
+        The last window values of the diagonal averaging of a group only
+        depend on the last window lagged vectors of the segment. They
+        are projected on the subspace spanned by the group eigenvectors
+        and their antidiagonals are averaged, as in BasicSsa.
+
+        """
+
+        w = self.window
+
+        if self._count < w:
+            raise IndexError('At least window={} samples are needed, got {}.'.format(w, self._count))
+
+        if name == 'Original':
+            return self._history[len(self._history) - w:]
+
+        idx = self._groupidx[name]
+        ug = self._u[:, idx]
+
+        # last window lagged vectors, or fewer at the start of the series
+
+        tail = self._history[max(0, len(self._history) - 2 * w + 1):]
+        z = np.dot(_embed(tail, w).T, ug)
+
+        sums = _prefixtails(ug, z, len(z) - 1)[0]
+
+        # number of lagged vectors of the segment averaged at each position
+
+        n = self._count if self.maxlen is None else min(self._count, self.maxlen)
+
+        return sums / np.minimum(w - np.arange(w), n - w + 1)
@@ -0,0 +1,216 @@
+"""Content addressed memoization of SSA decompositions
+
+"""
+import copy
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from tsar.algorithms.basicssa import BasicSsa, __TS_DEFAULT_TYPE__
+
+
+class SsaCache(object):
+    """A memoizing factory of BasicSsa decompositions
+
+    Decompositions are keyed by a hash of the series bytes, the window
+    and the solver options, so that decomposing the same series with
+    the same options again is a lookup. Cached decompositions are kept
+    in memory within a budget, the least recently used ones are evicted
+    first. If a directory is given, decompositions are also saved to
+    disk (see BasicSsa.save) and evicted or new cache instances reload
+    them memory-mapped instead of recomputing the SVD.
+
+    Each call returns a new BasicSsa object sharing the cached
+    eigentriples, with its own groups and elementary series cache.
+
+    Parameters
+    ----------
+    maxbytes : int, optional
+        Memory budget of the cached decompositions in bytes, counting
+        the series and the eigentriples. Default is 256 MB.
+    directory : str, optional
+        Directory of the disk tier, created if missing. Default is
+        None, decompositions are only cached in memory.
+
+    Attributes
+    ----------
+    hits : int
+        number of calls served from memory or disk
+    misses : int
+        number of calls that computed a decomposition
+    disk_hits : int
+        number of hits served from the disk tier
+    nbytes : int
+        memory used by the cached decompositions
+
+    Examples
+    --------
+
+    >>> cache = SsaCache(maxbytes=2 ** 26)
+    >>> co2_ssa = cache(co2, window=120)
+    >>> co2_ssa = cache(co2, window=120)
+    >>> cache.hits, cache.misses
+    (1, 1)
+
+    """
+
+    def __init__(self, maxbytes=2 ** 28, directory=None):
+
+        self.maxbytes = maxbytes
+        self.directory = directory
+
+        if directory is not None and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.nbytes = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, ts, window=None, tstype=__TS_DEFAULT_TYPE__, n_components=None,
+                 solver='auto', dtype=np.float64):
+        """Decompose a series or get its cached decomposition
+
+        Parameters are the ones of BasicSsa.
+
+        Returns
+        -------
+        ssa : BasicSsa
+            the decomposition with no reconstructed groups
+
+        """
+
+        ts = np.ascontiguousarray(ts, dtype=dtype)
+
+        if window is None:
+            window = len(ts) // 2
+
+        key = self._key(ts, window, n_components, solver)
+
+        ssa = self._lookup(key)
+
+        if ssa is None:
+            ssa = BasicSsa(ts, window=window, n_components=n_components,
+                           solver=solver, dtype=dtype)
+            self._store(key, ssa)
+
+        return self._fresh(ssa, tstype)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def clear(self):
+        """Remove all decompositions from memory, the disk tier is kept"""
+
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    # --------------------------------------------------------
+    # Private methods
+
+    @staticmethod
+    def _key(ts, window, n_components, solver):
+        """Hash of the series content and of the decomposition options"""
+
+        options = repr((ts.dtype.str, ts.shape, int(window), n_components, solver))
+
+        h = hashlib.sha1(options.encode('utf8'))
+        h.update(ts.data)
+
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def _lookup(self, key):
+        """Cached decomposition of a key, or None"""
+
+        with self._lock:
+
+            if key in self._entries:
+                ssa, nbytes = self._entries.pop(key)
+                self._entries[key] = (ssa, nbytes)
+                self.hits += 1
+                return ssa
+
+        if self.directory is not None and os.path.isfile(self._path(key)):
+
+            ssa = BasicSsa.load(self._path(key), mmap=True)
+
+            with self._lock:
+                self.hits += 1
+                self.disk_hits += 1
+
+            self._insert(key, ssa)
+
+            return ssa
+
+        with self._lock:
+            self.misses += 1
+
+        return None
+
+    def _store(self, key, ssa):
+        """Cache a new decomposition in memory and on disk"""
+
+        if self.directory is not None:
+            ssa.save(self._path(key))
+
+        self._insert(key, ssa)
+
+    def _insert(self, key, ssa):
+        """Insert a decomposition in memory and evict least recently used ones"""
+
+        nbytes = self._sizeof(ssa)
+
+        # decompositions larger than the budget are not kept in memory
+
+        if nbytes > self.maxbytes:
+            return
+
+        with self._lock:
+
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+
+            self._entries[key] = (ssa, nbytes)
+            self.nbytes += nbytes
+
+            while self.nbytes > self.maxbytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+
+    @staticmethod
+    def _sizeof(ssa):
+        """Memory used by a decomposition, memory-mapped arrays excluded"""
+
+        arrays = [ssa.ts] + list(ssa.svd)
+
+        return sum(a.nbytes for a in arrays if not isinstance(a, np.memmap))
+
+    @staticmethod
+    def _fresh(ssa, tstype):
+        """Copy of a cached decomposition with its own groups and caches"""
+
+        new = copy.copy(ssa)
+
+        new.tstype = tstype
+
+        new._groupidx = dict()
+        new._groupidx['Original'] = None
+        new._grouped = []
+
+        new._fcache = None
+        new._fcached = np.zeros(ssa._d, dtype=bool)
+
+        return new
@@ -0,0 +1,154 @@
+"""Reusable SSA filters of fitted eigenbases
+
+"""
+import numpy as np
+import pandas as pd
+
+from tsar.algorithms.hankel import _BLOCK_SIZE, _floattype, _hankel_weights, _nextpow2
+
+
+def _projectorfilter(y, u, fur, fu, nfft):
+    """Diagonal averaging of U.U'.X for a block of series
+
+    Parameters
+    ----------
+    y : np.array
+        series of shape (m, N)
+    u : np.array
+        eigenvectors of shape (L, r)
+    fur, fu : np.array
+        Fourier transforms of size nfft of the reversed and of the
+        eigenvectors, of shape (nfft // 2 + 1, r)
+    nfft : int
+        transform size, greater or equal to N
+
+    Returns
+    -------
+    ts : np.array
+        filtered series of shape (m, N)
+
+    """
+
+    l = u.shape[0]
+    n = y.shape[1]
+
+    # z = X'.u_j for each series and eigenvector, as correlations
+
+    fy = np.fft.rfft(y, n=nfft, axis=1)
+    z = np.fft.irfft(fy[:, :, np.newaxis] * fur[np.newaxis], n=nfft, axis=1)[:, l - 1:n]
+
+    # antidiagonal sums of u_j.z_j', as convolutions summed over j
+    # in the frequency domain
+
+    fz = np.fft.rfft(z, n=nfft, axis=1)
+    ts = np.fft.irfft(np.einsum('mfr,fr->mf', fz, fu), n=nfft, axis=1)[:, :n]
+
+    return ts / _hankel_weights(l, n).astype(ts.dtype)
+
+
+class SsaFilter(object):
+    """A filter projecting series on a fitted SSA eigenbasis
+
+    The filter holds the eigenvectors U of a group of a decomposition.
+    Applying it to a series y embeds y into its trajectory matrix X,
+    projects the lagged vectors on span(U) and diagonal averages
+    U.U'.X, as the reconstruction of the group would do for the fitted
+    series. No singular value decomposition of y is computed: the
+    projection reduces to FIR filters, each eigenvector being correlated
+    with the series and then convolved with the result, computed by FFT
+    in O(N.r.log N) for a series of length N.
+
+    Filters are usually obtained from BasicSsa.filter.
+
+    Parameters
+    ----------
+    u : 2d array_like
+        Array of shape (L, r) holding orthonormal eigenvectors.
+
+    Examples
+    --------
+
+    >>> co2_ssa = BasicSsa(co2)
+    >>> co2_ssa.reconstruct({'Trend': [0, 3], 'Season': [1, 2, 4, 5]})
+    >>> season = co2_ssa.filter('Season')
+    >>> np.allclose(season.apply(co2), co2_ssa['Season'])
+    True
+    >>> panel = season.apply(pd.concat([co2, 2 * co2], axis=1))
+
+    """
+
+    def __init__(self, u):
+
+        u = np.asarray(u)
+
+        if u.ndim != 2:
+            raise TypeError('Eigenvectors should be a 2 dimensional array of shape (L, r).')
+
+        self.u = u
+        self.window = u.shape[0]
+
+        # transforms of the eigenvectors by transform size
+
+        self._transforms = dict()
+
+    def apply(self, data):
+        """Filter one or several series
+
+        Parameters
+        ----------
+        data : array_like
+            1d array like holding a series, or 2d array of shape (N, m)
+            or pd.DataFrame holding one series per column. Series should
+            be at least window long.
+
+        Returns
+        -------
+        ts : np.array, pd.Series or pd.DataFrame
+            filtered series, same type and shape as data
+
+        """
+
+        values = np.asarray(data)
+
+        if values.ndim not in (1, 2):
+            raise TypeError('Input object should be 1 or 2 dimensional numeric array like object.')
+
+        n = values.shape[0]
+
+        if n < self.window:
+            raise ValueError('Series of length {} are shorter than window {}.'.format(n, self.window))
+
+        y = np.atleast_2d(values.T).astype(_floattype(values, self.u))
+
+        nfft = _nextpow2(n)
+        fur, fu = self._transform(nfft)
+
+        # series are filtered in blocks to bound memory
+
+        m, r = y.shape[0], self.u.shape[1]
+        block = max(1, _BLOCK_SIZE // (nfft * max(r, 1)))
+
+        ts = np.empty_like(y)
+
+        for i in range(0, m, block):
+            ts[i:i + block] = _projectorfilter(y[i:i + block], self.u, fur, fu, nfft)
+
+        ts = ts[0] if values.ndim == 1 else ts.T
+
+        if isinstance(data, pd.DataFrame):
+            return pd.DataFrame(ts, index=data.index, columns=data.columns)
+
+        if isinstance(data, pd.Series):
+            return pd.Series(ts, index=data.index, name=data.name)
+
+        return ts
+
+    def _transform(self, nfft):
+        """Cached Fourier transforms of the reversed and of the eigenvectors"""
+
+        if nfft not in self._transforms:
+            fur = np.fft.rfft(self.u[::-1], n=nfft, axis=0)
+            fu = np.fft.rfft(self.u, n=nfft, axis=0)
+            self._transforms[nfft] = (fur, fu)
+
+        return self._transforms[nfft]
@@ -0,0 +1,122 @@
+"""Toeplitz Singular Spectrum Analysis with numpy
+
+"""
+import numpy as np
+import scipy.linalg
+
+from tsar.algorithms.basicssa import BasicSsa, __TS_DEFAULT_TYPE__
+from tsar.algorithms.hankel import _hankel_fft, _hankel_rmatmat, _lagproducts
+
+
+class ToeplitzSsa(BasicSsa):
+    """A class for Toeplitz Singular Spectrum Analysis
+
+    Toeplitz SSA is a variant of basic SSA suited to stationary series.
+    The left singular vectors of the trajectory matrix are replaced by
+    the eigenvectors of the (L, L) Toeplitz lag-covariance matrix
+
+    .. math::
+
+        C_{ij} = \\frac{1}{N - |i - j|} \\sum_{t=0}^{N - |i - j| - 1} x_t x_{t + |i - j|}
+
+    Lag covariances are estimated for all lags at once by FFT and the
+    factor vectors v_i = X'.u_i / s_i are obtained by FFT based products,
+    so the decomposition costs O(N log N + L^3) instead of O(L^2 K). This
+    matters when N is much larger than L.
+
+    Eigentriples are sorted by decreasing lag-covariance eigenvalues,
+    and s_i = ||X'.u_i||. All L eigenvectors are kept, even when L is
+    greater than K, so that they span the whole space and the elementary
+    series still sum to the original series.
+
+    The reconstruction, item access, w-correlation and plotting interface
+    is the one of BasicSsa.
+
+    Parameters
+    ----------
+    ts : 1d array_like
+        Array like holding the time series values.
+    window : int, optional
+        Window length L of the trajectory matrix. Default is half
+        the series length.
+    tstype : type, optional
+        Type of the series returned by item access. Default is
+        pd.Series if pandas is available, np.array otherwise.
+    n_components : int, optional
+        Number of leading eigentriples to compute, at most L. Default
+        is None, all L eigentriples are computed.
+    dtype : dtype, optional
+        Floating point type of the decomposition. Default is np.float64.
+
+    Examples
+    --------
+
+    >>> ts = tsar.datasets.lorenz()['x']
+    >>> ssa = ToeplitzSsa(ts, window=200, n_components=10)
+    >>> ssa.reconstruct({'Oscillations': [0, 1]})
+    >>> ssa['Oscillations'].describe()
+
+    References
+    ----------
+
+    [1] Golyandina, Nina, and Anatoly Zhigljavsky. Singular Spectrum Analysis for
+    Time Series. Springer Briefs in Statistics. Springer, 2013. Section 2.5.3.
+
+    """
+
+    def __init__(self, ts, window=None, tstype=__TS_DEFAULT_TYPE__, n_components=None,
+                 dtype=np.float64):
+
+        super(ToeplitzSsa, self).__init__(ts, window=window, tstype=tstype,
+                                          n_components=n_components, dtype=dtype)
+
+    # --------------------------------------------------------
+    # Private methods
+
+    def _setsolver(self, n_components, solver):
+        """Check the number of components, the solver is always 'toeplitz'"""
+
+        # the Toeplitz matrix has L eigenvectors whatever K
+
+        self._dmax = self.window
+
+        if n_components is not None and not 0 < n_components <= self._dmax:
+            raise ValueError('n_components should be in range [1, {}].'.format(self._dmax))
+
+        self.solver = 'toeplitz'
+        self.n_components = n_components
+
+    def _factorize(self):
+        """Eigentriples from the Toeplitz lag-covariance matrix
+
+        Returns
+        -------
+        u, s, v : np.array
+            eigentriples sorted by decreasing lag-covariance eigenvalues
+
+        """
+
+        n = self._n
+        w = self.window
+        r = self._dmax if self.n_components is None else self.n_components
+
+        # lag covariances for all lags at once
+
+        c = (_lagproducts(self.ts, w) / (n - np.arange(w))).astype(self.ts.dtype)
+
+        # leading eigenpairs of the Toeplitz matrix, ascending order
+
+        evals, u = scipy.linalg.eigh(scipy.linalg.toeplitz(c), eigvals=(w - r, w - 1))
+
+        u = u[:, ::-1]
+
+        # factor vectors by FFT based products z_i = X'.u_i
+
+        z = _hankel_rmatmat(_hankel_fft(self.ts), n, w, u)
+
+        s = np.sqrt(np.sum(z ** 2, axis=0))
+        v = (z / np.where(s > 0, s, 1.)).T
+
+        self._xrank = None
+
+        return u, s, v
@@ -0,0 +1,124 @@
+"""Truncated singular value decompositions of implicit matrices
+
+Matrices are only accessed through their products with blocks of
+vectors, so that structured matrices (eg. Hankel trajectory matrices)
+never need to be formed.
+
+"""
+import numpy as np
+
+
+def _randomized_svd(matmat, rmatmat, shape, rank, oversamples=10, niter=4,
+                    q0=None, random_state=None, dtype=float):
+    """Randomized truncated singular value decomposition
+
+    Parameters
+    ----------
+    matmat : function
+        computes A.m for m of shape (n, p)
+    rmatmat : function
+        computes A'.a for a of shape (m, p)
+    shape : tuple
+        shape (m, n) of the matrix A
+    rank : int
+        number of singular triples to compute
+    oversamples : int, optional
+        additional random vectors improving accuracy
+    niter : int, optional
+        number of power iterations
+    q0 : np.array, optional
+        array of shape (m, p0) spanning an approximation of the
+        leading left singular subspace, used as a warm start
+    random_state : int, optional
+        seed of the random generator
+    dtype : dtype, optional
+        floating point type of the random test vectors. Default is
+        float.
+
+    Returns
+    -------
+    u : np.array
+        left singular vectors of shape (m, rank)
+    s : np.array
+        singular values of shape (rank,)
+    v : np.array
+        right singular vectors of shape (rank, n)
+
+    References
+    ----------
+
+    [1] Halko, N., Martinsson, P. G., and Tropp, J. A. "Finding Structure with
+    Randomness: Probabilistic Algorithms for Constructing Approximate Matrix
+    Decompositions." SIAM Review 53, no. 2 (2011): 217-88.
+
+    """
+
+    m, n = shape
+    p = min(rank + oversamples, m, n)
+
+    rng = np.random.RandomState(random_state)
+
+    # range finder, optionally warm started from a previous subspace
+
+    if q0 is None:
+        y = matmat(rng.standard_normal(size=(n, p)).astype(dtype))
+    else:
+        q0 = np.asarray(q0, dtype=dtype)[:, :p]
+        y = q0
+        if q0.shape[1] < p:
+            extra = matmat(rng.standard_normal(size=(n, p - q0.shape[1])).astype(dtype))
+            y = np.hstack([q0, extra])
+
+    q = np.linalg.qr(y)[0]
+
+    # power iterations with re-orthonormalization
+
+    for i in range(niter):
+        z = np.linalg.qr(rmatmat(q))[0]
+        q = np.linalg.qr(matmat(z))[0]
+
+    # svd of the small projected matrix B = Q'.A
+
+    b = rmatmat(q).T
+    ub, s, v = np.linalg.svd(b, full_matrices=False)
+
+    u = np.dot(q, ub)
+
+    return u[:, :rank], s[:rank], v[:rank, :]
+
+
+def _arpack_svd(matmat, rmatmat, shape, rank, dtype=float):
+    """Lanczos truncated singular value decomposition
+
+    Uses the implicitly restarted Lanczos method of ARPACK through
+    scipy.sparse.linalg.svds.
+
+    Parameters
+    ----------
+    matmat : function
+        computes A.m for m of shape (n, p)
+    rmatmat : function
+        computes A'.a for a of shape (m, p)
+    shape : tuple
+        shape (m, n) of the matrix A
+    rank : int
+        number of singular triples to compute, lower than min(m, n)
+    dtype : dtype, optional
+        floating point type of the operator. Default is float.
+
+    Returns
+    -------
+    u, s, v : np.array
+        singular triples sorted by decreasing singular values
+
+    """
+
+    from scipy.sparse.linalg import LinearOperator, svds
+
+    op = LinearOperator(shape, matvec=matmat, rmatvec=rmatmat, matmat=matmat, dtype=dtype)
+
+    u, s, v = svds(op, k=rank)
+
+    order = np.argsort(s)[::-1]
+
+    return u[:, order], s[order], v[order, :]
@@ -0,0 +1,127 @@
+"""Window length selection for Singular Spectrum Analysis
+
+"""
+import numpy as np
+
+from tsar.algorithms.hankel import _diagavg_rankone, _hankel_fft, _hankel_matmat
+from tsar.algorithms.hankel import _hankel_rmatmat, _hankel_weights, _wcorr
+from tsar.algorithms.parallel import _poolmap
+from tsar.algorithms.truncatedsvd import _randomized_svd
+
+
+def _sweepwindow(args):
+    """Truncated decomposition diagnostics for one window length
+
+    Parameters
+    ----------
+    args : tuple
+        (ts, fts, window, n_components) where fts is the shared Fourier
+        transform of the series, see _hankel_fft
+
+    Returns
+    -------
+    result : dict
+        diagnostics of the window, see windowsweep
+
+    """
+
+    ts, fts, w, r = args
+
+    n = len(ts)
+    k = n - w + 1
+    r = min(r, w, k)
+
+    matmat = lambda m: _hankel_matmat(fts, n, w, m)
+    rmatmat = lambda a: _hankel_rmatmat(fts, n, w, a)
+
+    u, s, v = _randomized_svd(matmat, rmatmat, (w, k), r, random_state=0)
+
+    # elementary series and their w-correlations
+
+    f = _diagavg_rankone(u, s, v)
+    weights = _hankel_weights(w, n)
+
+    # squared Frobenius norm of the trajectory matrix, each value
+    # appears as many times as its Hankel weight
+
+    xnorm = np.sum(weights * ts ** 2)
+
+    residuals = ts - np.sum(f, axis=0)
+
+    result = {
+        'values': s,
+        'contribution': s ** 2 / xnorm,
+        'wcorr': _wcorr(f, weights),
+        'error': np.sqrt(np.mean(residuals ** 2)),
+    }
+
+    return result
+
+
+def windowsweep(ts, windows, n_components=10, n_jobs=None):
+    """Evaluate SSA decompositions over candidate window lengths
+
+    For each window length L, the n_components leading eigentriples are
+    computed with a randomized truncated SVD. The Fourier transform of
+    the series used by the trajectory matrix products does not depend on
+    L, so it is computed once and shared by all candidates. Candidates
+    can be evaluated in parallel over a process pool.
+
+    Parameters
+    ----------
+    ts : 1d array_like
+        Array like holding the time series values.
+    windows : list of int
+        Candidate window lengths.
+    n_components : int, optional
+        Number of leading eigentriples computed for each window.
+        Default is 10.
+    n_jobs : int, optional
+        Number of processes evaluating windows. Default is None,
+        windows are evaluated in the current process.
+
+    Returns
+    -------
+    sweep : dict
+        Window lengths mapped to dictionaries holding
+
+        'values'
+            leading singular values
+        'contribution'
+            share of the trajectory matrix squared norm of each
+            eigentriple
+        'wcorr'
+            w-correlation matrix of the leading components, a measure
+            of their separability
+        'error'
+            root mean square error of the reconstruction of the series
+            by the leading components
+
+    Examples
+    --------
+
+    >>> sweep = windowsweep(co2, windows=[12, 24, 36, 120, 234], n_components=6)
+    >>> [round(sweep[w]['error'], 3) for w in sorted(sweep)]
+    [0.144, 0.212, 0.254, 0.43, 0.483]
+
+    """
+
+    ts = np.asarray(ts, dtype=float)
+
+    if ts.ndim != 1:
+        raise TypeError('Input object should be 1 dimensional numeric array like object.')
+
+    windows = sorted(set(windows))
+
+    if len(windows) == 0 or windows[0] < 1 or windows[-1] > len(ts):
+        raise ValueError('Windows should be in range [1, {}].'.format(len(ts)))
+
+    # Fourier transform shared by all windows
+
+    fts = _hankel_fft(ts)
+
+    tasks = [(ts, fts, w, n_components) for w in windows]
+
+    results = _poolmap(_sweepwindow, tasks, n_jobs=n_jobs)
+
+    return dict(zip(windows, results))
@@ -0,0 +1,66 @@
+"""Python functions for nonlinear time series analysis
+
+"""
+
+import numpy as np
+
+from tsar.dtypes import is_1darray_like
+from tsar.algorithms.hankel import _embed
+
+
+def delayembedding(ts, dimension, delay=1):
+    """Time delay embedding
+
+    Reconstruct the phase space of a time series with the method
+    of delays. Delay vectors are returned as rows of a read-only
+    strided view of the series, no data is copied.
+
+    Parameters
+    ----------
+    ts : 1d array_like
+        Array like holding the time series values.
+    dimension : int
+        Embedding dimension m.
+    delay : int, optional
+        Time delay tau between two coordinates. Default is 1.
+
+    Returns
+    -------
+    vectors : np.array
+        Array of shape (n - (m - 1) * tau, m) holding the delay vectors
+        [ts[i], ts[i + tau], ..., ts[i + (m - 1) * tau]].
+
+    Examples
+    --------
+
+    >>> delayembedding(np.arange(6.), dimension=3, delay=2)
+    array([[0., 2., 4.],
+           [1., 3., 5.]])
+
+    Raises
+    ------
+    TypeError
+        Raised if input is not one dimensional numeric.
+    ValueError
+        Raised if the embedding does not fit in the time series.
+
+    References
+    ----------
+
+    [1] Takens, Floris. "Detecting Strange Attractors in Turbulence." In Dynamical
+    Systems and Turbulence, Warwick 1980, 366-81. Springer, 1981.
+
+    """
+
+    if not is_1darray_like(ts):
+        raise TypeError('Input object should be 1 dimensional numeric array like object.')
+
+    ts = np.asarray(ts)
+
+    return _embed(ts, dimension, delay).T
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
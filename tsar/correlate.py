@@ -8,18 +8,19 @@
 
 import numpy as np
 import pandas as pd
-from sklearn.metrics import mutual_info_score
 
 import tsar
 from tsar.dtypes import is_1darray_like
-from tsar.algorithms.mutualinformation import _compute_mi_binned
+from tsar.algorithms.mutualinformation import _compute_ami_binned
+from tsar.algorithms.correlation import _blockautocorrelation, _crosscorrelation
+from tsar.algorithms.correlation import _pairwisecrosscorrelation
 
 
 # ----------------------------------------------------------------------
 # Self dependency functions
 
 
-def autocorrelation(ts, maxlag=20):
+def autocorrelation(ts, maxlag=20, method='fft', n_jobs=None):
     """Auto Correlation Function
     
     The auto correlation function is a metric of linear self dependence.
@@ -28,21 +29,38 @@ def autocorrelation(ts, maxlag=20):
     its multiple lags.
     
     The function returns the Pearson correlation coefficient as a function
-    of time lag. Correlation coefficient are stored in list object and the
-    lag corresponds to the list index. 
+    of time lag. Correlation coefficient are stored in an array and the
+    lag corresponds to the array index. At lag k, the coefficient is the
+    one of ts[k:] and ts[:N-k], as computed by pd.Series.autocorr.
+
+    With the 'fft' method, lagged products of all lags are computed at
+    once by FFT in O(N log N), and the sums needed by the Pearson
+    coefficients are obtained from prefix sums.
+
+    Columns of 2d inputs are processed at once, by blocks of columns
+    bounding memory, optionally in a pool of threads.
     
     Parameters
     ----------
-    ts : 1d array_like
+    ts : 1d or 2d array_like
         Array like holding the time series values. Valid types are list of 
-        number, dict of number values, numpy 1d array or pandas Series.
+        number, dict of number values, numpy 1d array or pandas Series,
+        or 2d numpy array of shape (N, ncols) or pandas DataFrame holding
+        one series per column.
     maxlag : int
         Maximum lag to compute autocorrelation.
+    method : str, optional
+        'fft' or 'direct'. The 'direct' method computes one dot product
+        per lag in O(N.maxlag). Default is 'fft'.
+    n_jobs : int, optional
+        Number of threads processing blocks of columns of 2d inputs.
+        Default is None, blocks are processed in the current thread.
 
     Returns
     -------
-    autocorrelation : list
-        List holding autocorrelation values up to maxlag
+    autocorrelation : np.array
+        Array holding autocorrelation values up to maxlag, of shape
+        (maxlag + 1,) or (maxlag + 1, ncols) for 2d inputs
     
     Examples
     --------
@@ -50,39 +68,54 @@ def autocorrelation(ts, maxlag=20):
     >>> ts = tsar.datasets.lorenz()['x']
     >>> rho = autocorrelation(ts, maxlag=2)
     >>> print rho
-    [0.99999999999999989, 0.9985116968252471, 0.9940665907167473]
+    [1.         0.99850067 0.99402273]
+
+    >>> rho = autocorrelation(tsar.datasets.lorenz(), maxlag=2)
+    >>> rho.shape
+    (3, 3)
     
     Raises
     ------
     TypeError
-        Raised if input is not one dimensional numeric.
+        Raised if input is not one or two dimensional numeric.
     IndexError
         Raised if maxlag greater than time series length.
+    ValueError
+        Raised if method is unknown.
     
     """
 
-    # TODO: prefer not using pandas to lower dependencies
-    # TODO: draft doc to be improved
+    # test for one or two-dimensional object
 
-    # test for one-dimensional object
+    if isinstance(ts, (pd.DataFrame, np.ndarray)) and np.ndim(ts) == 2:
 
-    if not is_1darray_like(ts):
-        raise TypeError('Input object should be 1 dimensional numeric array like object.')
+        x = np.asarray(ts)
 
-    # test for Index error
+        if not np.issubdtype(x.dtype, np.number):
+            raise TypeError('Input object should be 1 or 2 dimensional numeric array like object.')
 
-    if maxlag >= len(ts):
-        raise IndexError('Maximum lag {} is greater than series length {}'.format(maxlag, len(ts)))
+    elif is_1darray_like(ts):
 
-    # list of lags
+        # dict values are ordered as pd.Series does
 
-    lags = range(maxlag + 1)
+        x = np.asarray(pd.Series(ts))[:, np.newaxis]
 
-    # conversion of ts into a pd.Series
+    else:
 
-    ts = pd.Series(ts)
+        raise TypeError('Input object should be 1 or 2 dimensional numeric array like object.')
 
-    autocorr = [ts.autocorr(i) for i in lags]
+    # test for Index error
+
+    if maxlag >= len(x):
+        raise IndexError('Maximum lag {} is greater than series length {}'.format(maxlag, len(x)))
+
+    if method not in ('fft', 'direct'):
+        raise ValueError('Unknown method \'{}\'. Method should be one of fft,direct.'.format(method))
+
+    autocorr = _blockautocorrelation(x.astype(float), maxlag, method=method, n_jobs=n_jobs)
+
+    if np.ndim(ts) != 2:
+        autocorr = autocorr[:, 0]
 
     return autocorr
 
@@ -97,7 +130,9 @@ def automutualinfo(ts, maxlag=20, bins='sqrt', logfunc=np.log, method='binned'):
 
         MI(X,Y)=\sum_{x \in X}^R \sum_{y \in Y} P(x,y)\log\\frac{P(x,y)}{P(x)P'(y)}
         
-        
+    Bin edges are computed once from the whole series, which is
+    quantized into integer bin codes. The joint histogram of each lag is
+    then a single count of the combined codes of its pairs.
     
     Parameters
     ----------
@@ -157,7 +192,7 @@ def automutualinfo(ts, maxlag=20, bins='sqrt', logfunc=np.log, method='binned'):
     >>> ts = tsar.datasets.lorenz()['x'].iloc[:100]
     >>> ami = automutualinfo(ts, maxlag=2, bins='sqrt')
     >>> print ami
-    [2.1316557270483645, 1.7303407746505963, 1.5756941465276517]
+    [2.1316557270483636, 1.730340774650596, 1.5756941465276508]
 
     References
     ----------
@@ -192,36 +227,180 @@ def automutualinfo(ts, maxlag=20, bins='sqrt', logfunc=np.log, method='binned'):
         raise NotImplementedError(
             'Not implemented method {}. Only binned method is currently supported.'.format(method))
 
-    # conversion of ts into a pd.Series
+    # conversion of ts into an array, dict values are ordered as
+    # pd.Series does
+
+    ts = np.asarray(pd.Series(ts), dtype=float)
+
+    # the series is binned once, with bin edges of the whole series,
+    # then each lag costs a single joint histogram
+
+    automi = _compute_ami_binned(ts, maxlag, bins=bins, logfunc=logfunc).tolist()
 
-    ts = pd.Series(ts)
+    return automi
 
-    # list of lags
+# ----------------------------------------------------------------------
+# Cross dependency functions
 
-    lags = range(maxlag + 1)
 
-    # use numpy histogram to get bins
+def crosscorrelation(x, y, maxlag=20, method='fft'):
+    """Cross Correlation Function
 
-    #bin_edges = np.histogram(ts.values, bins=bins)[1]
+    The cross correlation function is a metric of linear dependence
+    between a time series and the lags of another one.
 
-    # define auto mutual information list
-    automi = []
+    The correlation at lag k is the Pearson correlation coefficient of
+    x[t] and y[t + k] over the overlapping samples, k ranging from
+    -maxlag to maxlag. A positive lag of maximum correlation means that
+    y follows x with a delay, eg. y[t] = x[t - k].
 
-    for t in lags:
+    With the 'fft' method, lagged products of all lags are computed at
+    once by FFT in O((N + M) log(N + M)), and the sums needed by the
+    Pearson coefficients are obtained from prefix sums. Series can have
+    different lengths, the transforms are padded to the length of the
+    longest one plus maxlag only.
 
-        ts_lag = ts.shift(t)
+    Parameters
+    ----------
+    x : 1d array_like
+        Array like holding the time series values. Valid types are list of
+        number, dict of number values, numpy 1d array or pandas Series.
+    y : 1d array_like
+        Array like holding the lagged time series values, same valid
+        types as x.
+    maxlag : int
+        Maximum absolute lag to compute cross correlation.
+    method : str, optional
+        'fft' or 'direct'. The 'direct' method computes one dot product
+        per lag in O(N.maxlag). Default is 'fft'.
 
-        x = ts[t:]
-        y = ts_lag[t:]
+    Returns
+    -------
+    crosscorrelation : np.array
+        Array of size 2 * maxlag + 1 holding cross correlation values
+        from lag -maxlag to maxlag, ie. lag k is at index maxlag + k.
+    lag : int
+        Lag of maximum correlation.
 
-        mi = _compute_mi_binned(x, y, bins=bins, logfunc=logfunc)
+    Examples
+    --------
 
-        automi.append(mi)
+    >>> lorenz = tsar.datasets.lorenz()
+    >>> rho, lag = crosscorrelation(lorenz['x'], lorenz['y'], maxlag=50)
+    >>> lag
+    -8
 
-    return automi
+    Raises
+    ------
+    TypeError
+        Raised if inputs are not one dimensional numeric.
+    IndexError
+        Raised if maxlag greater than a time series length.
+    ValueError
+        Raised if method is unknown.
+
+    """
+
+    # test for one-dimensional objects
+
+    if not (is_1darray_like(x) and is_1darray_like(y)):
+        raise TypeError('Input objects should be 1 dimensional numeric array like objects.')
+
+    # test for Index error
+
+    if maxlag >= min(len(x), len(y)):
+        raise IndexError('Maximum lag {} is greater than series length {}'.format(maxlag, min(len(x), len(y))))
+
+    if method not in ('fft', 'direct'):
+        raise ValueError('Unknown method \'{}\'. Method should be one of fft,direct.'.format(method))
+
+    # dict values are ordered as pd.Series does
+
+    x = np.asarray(pd.Series(x), dtype=float)
+    y = np.asarray(pd.Series(y), dtype=float)
+
+    crosscorr = _crosscorrelation(x, y, maxlag, method=method)
+
+    lag = int(np.nanargmax(crosscorr)) - maxlag
+
+    return crosscorr, lag
+
+
+def crosscorrelationmatrix(data, maxlag=20, topk=None, n_jobs=None):
+    """Peak cross correlation of all pairs of series
+
+    For each pair of series (a, b), the cross correlation of a with the
+    lags of b is computed as by crosscorrelation for lags from -maxlag to
+    maxlag, and only its maximum and the corresponding lag are kept.
+
+    The Fourier transform of each series is computed once and shared by
+    all its pairs. Pairs are processed in blocks bounding memory,
+    optionally over a process pool, and only half of the pairs are
+    computed, the peak of (b, a) being the one of (a, b) at the
+    opposite lag. With topk, only the topk largest peaks of each series
+    are kept, so that no (n, n) array is formed.
+
+    Parameters
+    ----------
+    data : 2d array_like
+        Array of shape (N, n) or pd.DataFrame holding one series per
+        column.
+    maxlag : int
+        Maximum absolute lag to compute cross correlation.
+    topk : int, optional
+        Number of largest peaks kept for each series. Default is None,
+        peaks of all pairs are returned.
+    n_jobs : int, optional
+        Number of processes evaluating blocks of pairs. Default is None,
+        blocks are evaluated in the current process.
+
+    Returns
+    -------
+    peak : np.array
+        array of shape (n, n) whose element (a, b) is the maximum cross
+        correlation of series a with the lags of series b
+    lag : np.array
+        array of shape (n, n) holding the lags of the maxima
+
+    If topk is given, the function returns instead
+
+    index : np.array
+        array of shape (n, topk), indexes of the series with the largest
+        peaks sorted by decreasing peak, for each series
+    peak : np.array
+        array of shape (n, topk), the corresponding peaks
+    lag : np.array
+        array of shape (n, topk), the corresponding lags
+
+    Examples
+    --------
+
+    >>> lorenz = tsar.datasets.lorenz()
+    >>> peak, lag = crosscorrelationmatrix(lorenz, maxlag=50)
+    >>> lag
+    array([[  0,  -8,  45],
+           [  8,   0,  50],
+           [-45, -50,   0]])
+
+    Raises
+    ------
+    TypeError
+        Raised if input is not two dimensional numeric.
+    IndexError
+        Raised if maxlag greater than time series length.
+
+    """
+
+    x = np.asarray(data)
+
+    if x.ndim != 2 or not np.issubdtype(x.dtype, np.number):
+        raise TypeError('Input object should be 2 dimensional numeric array like object.')
+
+    if maxlag >= len(x):
+        raise IndexError('Maximum lag {} is greater than series length {}'.format(maxlag, len(x)))
+
+    return _pairwisecrosscorrelation(x.astype(float), maxlag, topk=topk, n_jobs=n_jobs)
 
-def crosscorrelation():
-    pass
 
 def crossmutualinfo():
     pass
@@ -1,6 +1,17 @@
 __docformat__ = 'restructuredtext'
 
 from tsar.algorithms.basicssa import BasicSsa
+from tsar.algorithms.sequentialssa import SequentialSsa
+from tsar.algorithms.panelssa import PanelSsa
+from tsar.algorithms.mssa import MultichannelSsa
+from tsar.algorithms.toeplitzssa import ToeplitzSsa
+from tsar.algorithms.outofcoressa import OutOfCoreSsa
+from tsar.algorithms.ssacache import SsaCache
+from tsar.algorithms.ssafilter import SsaFilter
+from tsar.algorithms.windowsweep import windowsweep
+from tsar.algorithms.montecarlossa import montecarlossa
+from tsar.algorithms.changepoint import changepoints
+from tsar.algorithms.gapfill import gapfill
 
 # module level doc-string
 __doc__ = """
@@ -0,0 +1,51 @@
+"""Tests for the chaos.py module
+
+"""
+
+import unittest
+import pandas as pd
+import numpy as np
+from tsar import chaos
+
+
+class TestDelayEmbedding(unittest.TestCase):
+    """Tests for the delayembedding function"""
+
+    def setUp(self):
+
+        self.ts = np.arange(20.)
+
+    def test_shape(self):
+        """Test the number and the dimension of delay vectors"""
+        for dimension, delay in [(1, 1), (3, 1), (3, 4), (5, 2)]:
+            vectors = chaos.delayembedding(self.ts, dimension, delay=delay)
+            self.assertEqual(vectors.shape, (20 - (dimension - 1) * delay, dimension))
+
+    def test_delay_order(self):
+        """Test that coordinates are the series at increasing delays"""
+        vectors = chaos.delayembedding(self.ts, 3, delay=4)
+        for i in [0, 5, 11]:
+            self.assertTrue(np.array_equal(vectors[i], [i, i + 4, i + 8]))
+
+        series = pd.Series(self.ts ** 2)
+        vectors = chaos.delayembedding(series, 2, delay=3)
+        self.assertTrue(np.array_equal(vectors[:, 1], series.values[3:]))
+
+    def test_readonly_view(self):
+        """Test that delay vectors are a read-only view of the series"""
+        vectors = chaos.delayembedding(self.ts, 4, delay=2)
+
+        self.assertTrue(np.may_share_memory(vectors, self.ts))
+        self.assertFalse(vectors.flags.writeable)
+
+    def test_errors(self):
+        """Test that embeddings not fitting the series raise ValueError"""
+        self.assertRaises(ValueError, chaos.delayembedding, self.ts, 21)
+        self.assertRaises(ValueError, chaos.delayembedding, self.ts, 5, delay=5)
+        self.assertRaises(ValueError, chaos.delayembedding, self.ts, 0)
+        self.assertRaises(TypeError, chaos.delayembedding, np.zeros(shape=(4, 3)), 2)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -5,6 +5,7 @@
 import unittest
 import pandas as pd
 import numpy as np
+import tsar
 from tsar import correlate as corr
 
 class TestAutoCorrelation(unittest.TestCase):
@@ -24,8 +25,8 @@ class TestAutoCorrelation(unittest.TestCase):
 
         bad_list = [str(i) for i in data] # list is string
         bad_dict = dict(zip(data, [[1,2]]*len(data))) # dict values are list
-        bad_df   = pd.DataFrame(data) # dataframe object
-        bad_array = np.zeros(shape=(4,3)) # ndarray
+        bad_df   = pd.DataFrame({'a': [str(i) for i in data]}) # dataframe of strings
+        bad_array = np.zeros(shape=(4,3,2)) # 3d ndarray
         bad_scalar = 1. # scalar
 
         self.valid_inputs = [
@@ -48,7 +49,47 @@ class TestAutoCorrelation(unittest.TestCase):
         results = []
         for good in self.valid_inputs:
             results.append(corr.autocorrelation(good, maxlag=5))
-        self.assertTrue(all(x == results[0] for x in results))
+        self.assertTrue(all(np.array_equal(x, results[0]) for x in results))
+
+    def test_pandas_autocorr(self):
+        """Test that both methods match pd.Series.autocorr"""
+        ts = tsar.datasets.lorenz(n=2000)['x']
+        expected = [ts.autocorr(i) for i in range(101)]
+
+        for method in ['fft', 'direct']:
+            rho = corr.autocorrelation(ts, maxlag=100, method=method)
+
+            self.assertTrue(isinstance(rho, np.ndarray))
+            self.assertTrue(np.allclose(rho, expected, rtol=0, atol=1e-10))
+
+    def test_columns(self):
+        """Test that 2d inputs give the autocorrelation of each column"""
+        df = tsar.datasets.lorenz(n=2000)
+        expected = np.column_stack([corr.autocorrelation(df[c], maxlag=50) for c in df.columns])
+
+        self.assertTrue(np.allclose(corr.autocorrelation(df, maxlag=50), expected))
+        self.assertTrue(np.allclose(corr.autocorrelation(df.values, maxlag=50, method='direct'), expected))
+
+    def test_column_blocks(self):
+        """Test that blocks of columns processed by threads give the same results"""
+        from tsar.algorithms import correlation
+
+        x = np.random.RandomState(0).standard_normal(size=(1000, 40)).cumsum(axis=0)
+        expected = corr.autocorrelation(x, maxlag=30)
+
+        size = correlation._BLOCK_SIZE
+        correlation._BLOCK_SIZE = 3 * 1024
+        try:
+            blocks = corr.autocorrelation(x, maxlag=30, n_jobs=4)
+        finally:
+            correlation._BLOCK_SIZE = size
+
+        self.assertEqual(blocks.shape, (31, 40))
+        self.assertTrue(np.allclose(blocks, expected))
+
+    def test_method_error(self):
+        """Test if an unknown method raises ValueError"""
+        self.assertRaises(ValueError, corr.autocorrelation, self.valid_inputs[0], maxlag=5, method='naive')
 
     def test_ndtype_error(self):
         """Test if a n-dimensional object raises a TypeError"""
@@ -61,6 +102,117 @@ class TestAutoCorrelation(unittest.TestCase):
         self.assertRaises(IndexError, corr.autocorrelation, s, maxlag=15)
 
 
+class TestAutoMutualInfo(unittest.TestCase):
+    """Tests for the automutualinfo function"""
+
+    def setUp(self):
+
+        self.ts = tsar.datasets.lorenz(n=2000)['x']
+
+    def test_binned_lags(self):
+        """Test that each lag matches the histogram estimate with series bin edges"""
+        from tsar.algorithms.mutualinformation import _compute_mi_binned
+
+        x = self.ts.values
+        n = len(x)
+
+        for bins in ['sqrt', 12, np.linspace(-10., 10., 15)]:
+            edges = np.histogram_bin_edges(x, bins=bins)
+            expected = [_compute_mi_binned(x[t:], x[:n - t], bins=[edges, edges]) for t in range(31)]
+
+            self.assertTrue(np.allclose(corr.automutualinfo(self.ts, maxlag=30, bins=bins), expected))
+
+    def test_logfunc(self):
+        """Test that the logarithm base is applied"""
+        nats = corr.automutualinfo(self.ts, maxlag=5)
+        bits = corr.automutualinfo(self.ts, maxlag=5, logfunc=np.log2)
+
+        self.assertTrue(np.allclose(np.array(bits) * np.log(2.), nats))
+
+
+class TestCrossCorrelation(unittest.TestCase):
+    """Tests for the crosscorrelation function"""
+
+    def setUp(self):
+
+        rs = np.random.RandomState(1)
+
+        self.x = rs.standard_normal(300).cumsum()
+        self.y = rs.standard_normal(220).cumsum()
+
+    def test_pearson_overlap(self):
+        """Test both methods against Pearson coefficients of overlapping samples"""
+        n, m = len(self.x), len(self.y)
+        expected = [np.corrcoef(self.x[max(0, -k):min(n, m - k)], self.y[max(0, k):min(m, n + k)])[0, 1]
+                    for k in range(-40, 41)]
+
+        for method in ['fft', 'direct']:
+            rho, lag = corr.crosscorrelation(self.x, self.y, maxlag=40, method=method)
+
+            self.assertEqual(rho.shape, (81,))
+            self.assertTrue(np.allclose(rho, expected))
+            self.assertEqual(lag, np.argmax(expected) - 40)
+
+    def test_delay(self):
+        """Test that the lag of maximum correlation is the delay"""
+        delayed = np.concatenate([np.zeros(7), self.x[:-7]])
+
+        self.assertEqual(corr.crosscorrelation(self.x, delayed)[1], 7)
+        self.assertEqual(corr.crosscorrelation(pd.Series(delayed[:250]), list(self.x))[1], -7)
+
+    def test_errors(self):
+        """Test input type, lag and method errors"""
+        self.assertRaises(TypeError, corr.crosscorrelation, self.x, np.zeros(shape=(4, 3)))
+        self.assertRaises(IndexError, corr.crosscorrelation, self.x, self.y, maxlag=220)
+        self.assertRaises(ValueError, corr.crosscorrelation, self.x, self.y, method='naive')
+
+class TestCrossCorrelationMatrix(unittest.TestCase):
+    """Tests for the crosscorrelationmatrix function"""
+
+    def setUp(self):
+
+        self.x = np.random.RandomState(0).standard_normal(size=(500, 30)).cumsum(axis=0)
+
+        pairs = [[corr.crosscorrelation(a, b, maxlag=25) for b in self.x.T] for a in self.x.T]
+
+        self.peak = np.array([[np.max(rho) for rho, _ in row] for row in pairs])
+        self.lag = np.array([[lag for _, lag in row] for row in pairs])
+
+    def test_pairs(self):
+        """Test peaks and lags against crosscorrelation of each pair"""
+        peak, lag = corr.crosscorrelationmatrix(pd.DataFrame(self.x), maxlag=25)
+
+        self.assertTrue(np.allclose(peak, self.peak))
+        self.assertTrue(np.array_equal(lag, self.lag))
+
+    def test_blocks_topk(self):
+        """Test blocks of pairs over a process pool and top-k peaks"""
+        from tsar.algorithms import correlation
+
+        peak = self.peak.copy()
+        np.fill_diagonal(peak, -np.inf)
+        order = np.argsort(-peak, axis=1)[:, :5]
+
+        size = correlation._BLOCK_SIZE
+        correlation._BLOCK_SIZE = 1024 * 30
+        try:
+            blocks = corr.crosscorrelationmatrix(self.x, maxlag=25, n_jobs=2)
+            index, top, lag = corr.crosscorrelationmatrix(self.x, maxlag=25, topk=5, n_jobs=2)
+        finally:
+            correlation._BLOCK_SIZE = size
+
+        self.assertTrue(np.allclose(blocks[0], self.peak))
+        self.assertTrue(np.array_equal(blocks[1], self.lag))
+
+        self.assertTrue(np.array_equal(index, order))
+        self.assertTrue(np.allclose(top, np.take_along_axis(peak, order, axis=1)))
+        self.assertTrue(np.array_equal(lag, np.take_along_axis(self.lag, order, axis=1)))
+
+    def test_errors(self):
+        """Test input type and lag errors"""
+        self.assertRaises(TypeError, corr.crosscorrelationmatrix, self.x[:, 0])
+        self.assertRaises(IndexError, corr.crosscorrelationmatrix, self.x, maxlag=500)
+
 
 if __name__ == '__main__':
 
@@ -0,0 +1,773 @@
+"""Tests for the decompose.py module
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+import numpy as np
+from scipy.signal import lfilter
+import tsar
+from tsar import decompose as dec
+
+CO2_PATH = os.path.join(os.path.dirname(dec.__file__), 'algorithms', 'co2.csv')
+
+
+def load_co2():
+    co2 = pd.read_csv(CO2_PATH, index_col=0, header=None)
+    return co2[co2.columns[0]]
+
+
+class TestBasicSsa(unittest.TestCase):
+    """Tests for the BasicSsa class"""
+
+    def setUp(self):
+
+        self.ts = load_co2()
+        self.groups = {'Trend': [0, 3], 'Season': [1, 2, 4, 5]}
+
+    def test_original(self):
+        """Test that the original group restores the time series"""
+        ssa = dec.BasicSsa(self.ts)
+        self.assertTrue(np.allclose(ssa['Original'], self.ts.values))
+
+    def test_strided_embedding(self):
+        """Test that the trajectory matrix is a read-only view of the series"""
+        ssa = dec.BasicSsa(self.ts, window=24)
+        x = ssa._x
+
+        self.assertTrue(isinstance(x, np.ndarray) and not isinstance(x, np.matrix))
+        self.assertTrue(np.may_share_memory(x, ssa.ts))
+        self.assertFalse(x.flags.writeable)
+        self.assertTrue(np.array_equal(x[:, 5], ssa.ts[5:29]))
+
+    def test_fft_diagonal_averaging(self):
+        """Test that group series match direct antidiagonal averaging"""
+        ssa = dec.BasicSsa(self.ts, window=24)
+        ssa.reconstruct(self.groups)
+
+        for g, idx in self.groups.items():
+            u, s, v = ssa.svd
+            x = np.sum([s[i] * np.outer(u[:, i], v[i]) for i in idx], axis=0)
+            direct = [np.mean(x[::-1, :].diagonal(i)) for i in range(-x.shape[0] + 1, x.shape[1])]
+            self.assertTrue(np.allclose(ssa[g], direct))
+
+    def test_regrouping(self):
+        """Test that groups are summed from cached component series"""
+        ssa = dec.BasicSsa(self.ts)
+        ssa.reconstruct(self.groups)
+        trend = ssa['Trend']
+
+        self.assertEqual(list(np.flatnonzero(ssa._fcached)), [0, 3])
+        self.assertTrue(np.allclose(trend, ssa._componentseries([0, 3]).sum(axis=0)))
+
+        ssa.reconstruct({'Trend': [0], 'Season': [1, 2]})
+        fresh = dec.BasicSsa(self.ts)
+        fresh.reconstruct({'Trend': [0], 'Season': [1, 2]})
+
+        for g in fresh.groups:
+            self.assertTrue(np.allclose(ssa[g], fresh[g]))
+
+    def test_truncated_solvers(self):
+        """Test that truncated solvers match the leading full eigentriples"""
+        ssa = dec.BasicSsa(self.ts)
+        ssa.reconstruct(self.groups)
+
+        for solver in ['randomized', 'arpack']:
+            trunc = dec.BasicSsa(self.ts, n_components=10, solver=solver)
+            trunc.reconstruct(self.groups)
+
+            self.assertEqual(len(trunc.svd[1]), 10)
+            self.assertTrue(np.allclose(trunc.svd[1], ssa.svd[1][:10]))
+            for g in ssa.groups:
+                self.assertTrue(np.allclose(trunc[g], ssa[g], atol=1e-6))
+
+    def test_solver_error(self):
+        """Test that an unknown solver raises ValueError"""
+        self.assertRaises(ValueError, dec.BasicSsa, self.ts, solver='qr')
+        self.assertRaises(ValueError, dec.BasicSsa, self.ts, n_components=0)
+
+    def test_wcorr(self):
+        """Test w-correlation against its definition with Hankel weights"""
+        ssa = dec.BasicSsa(self.ts, window=60)
+
+        idx = [4, 0, 2]
+        u, s, v = ssa.svd
+        f = np.array([dec.BasicSsa._antidiagmean(s[i] * np.outer(u[:, i], v[i])) for i in idx])
+
+        n, l = ssa._n, ssa.window
+        w = np.array([min(t + 1, l, n - l + 1, n - t) for t in range(n)])
+        gram = np.dot(f * w, f.T)
+        norm = np.sqrt(np.diag(gram))
+
+        self.assertTrue(np.allclose(ssa.wcorr(idx), gram / np.outer(norm, norm)))
+        self.assertTrue(np.allclose(ssa.wcorr(5)[np.ix_(idx, idx)], ssa.wcorr(idx)))
+
+    def test_save_load(self):
+        """Test that a reloaded decomposition gives the same results"""
+        ssa = dec.BasicSsa(self.ts, n_components=20)
+        ssa.reconstruct(self.groups)
+
+        path = os.path.join(tempfile.mkdtemp(), 'co2_ssa.npz')
+
+        try:
+            ssa.save(path)
+
+            for mmap in [True, False]:
+                loaded = dec.BasicSsa.load(path, mmap=mmap)
+
+                self.assertEqual(isinstance(loaded.svd[0], np.memmap), mmap)
+                if mmap:
+                    # nothing but flags is read in memory
+                    attrs = list(vars(loaded).values())
+                    attrs += [a for d in attrs if isinstance(d, dict) for a in d.values()]
+                    inram = [a for a in attrs if isinstance(a, np.ndarray)
+                             and not isinstance(a, np.memmap) and not np.may_share_memory(a, loaded.ts)]
+                    self.assertTrue(sum(a.nbytes for a in inram) <= loaded._d)
+                self.assertEqual(sorted(loaded.groups), sorted(ssa.groups))
+                for g in ssa.groups:
+                    self.assertTrue(np.allclose(loaded[g], ssa[g]))
+                self.assertTrue(np.allclose(loaded.wcorr(6), ssa.wcorr(6)))
+
+                del loaded
+        finally:
+            shutil.rmtree(os.path.dirname(path))
+
+    def test_single_precision(self):
+        """Test float32 accuracy against float64 on co2 and Lorenz data"""
+        lorenz = tsar.datasets.lorenz(n=2000)['x']
+        cases = [(self.ts, self.groups), (lorenz, {'Oscillations': [0, 1]})]
+
+        for ts, groups in cases:
+            amplitude = np.ptp(np.asarray(ts))
+
+            for kw in [dict(), dict(n_components=10), dict(n_components=10, solver='arpack')]:
+                ssa = dec.BasicSsa(ts, **kw)
+                single = dec.BasicSsa(ts, dtype=np.float32, **kw)
+
+                ssa.reconstruct(groups)
+                single.reconstruct(groups)
+
+                self.assertEqual(single.svd[0].dtype, np.float32)
+                self.assertEqual(single.wcorr(6).dtype, np.float32)
+
+                for g in single.groups:
+                    self.assertEqual(single[g].dtype, np.float32)
+                    self.assertTrue(np.max(np.abs(single[g] - ssa[g])) < 1e-5 * amplitude)
+
+                self.assertTrue(np.allclose(single.wcorr(6), ssa.wcorr(6), atol=1e-5))
+
+    def test_group_index_error(self):
+        """Test that out of range components raise IndexError"""
+        ssa = dec.BasicSsa(self.ts, window=12)
+        self.assertRaises(IndexError, ssa.reconstruct, {'Trend': [0, 12]})
+
+
+class TestOutOfCoreSsa(unittest.TestCase):
+    """Tests for the OutOfCoreSsa class"""
+
+    def setUp(self):
+
+        self.ts = load_co2().values
+        self.groups = {'Trend': [0], 'Season': [1, 2]}
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmpdir)
+
+    def test_chunked_reconstruction(self):
+        """Test that chunked results match an in-memory decomposition"""
+        path = os.path.join(self.tmpdir, 'co2.npy')
+        np.save(path, self.ts)
+
+        ssa = dec.BasicSsa(self.ts, window=24)
+        ssa.reconstruct(self.groups)
+
+        for chunksize in [7, 100, 1000]:
+            ooc = dec.OutOfCoreSsa(path, window=24, chunksize=chunksize)
+            out = ooc.reconstruct(self.groups, path=os.path.join(self.tmpdir, 'groups.npy'))
+
+            self.assertTrue(np.allclose(ooc.svd[1], ssa.svd[1]))
+            for g in ['Trend', 'Season', 'Residuals']:
+                self.assertTrue(np.allclose(out[g], ssa[g]))
+
+            del out
+
+    def test_in_memory_output(self):
+        """Test that groups are held in memory without output path"""
+        ooc = dec.OutOfCoreSsa(self.ts, window=24, n_components=3, chunksize=50)
+        out = ooc.reconstruct(self.groups)
+
+        self.assertTrue(np.allclose(out['Trend'] + out['Season'] + out['Residuals'], self.ts))
+
+
+class TestGapFill(unittest.TestCase):
+    """Tests for the gapfill function"""
+
+    def setUp(self):
+
+        t = np.arange(2000.)
+
+        self.ts = np.sin(2 * np.pi * t / 50.) + 0.001 * t
+        self.gappy = self.ts.copy()
+        self.gappy[np.random.RandomState(0).choice(2000, 200, replace=False)] = np.nan
+        self.gappy[1000:1020] = np.nan
+
+    def test_finite_rank(self):
+        """Test that gaps of a finite rank series are recovered"""
+        filled = dec.gapfill(self.gappy, window=200, n_components=4)
+        observed = ~np.isnan(self.gappy)
+
+        self.assertTrue(np.array_equal(filled[observed], self.ts[observed]))
+        self.assertTrue(np.allclose(filled, self.ts, atol=1e-3))
+
+    def test_series(self):
+        """Test that pandas series keep their index"""
+        co2 = load_co2()
+        gappy = co2.copy()
+        gappy.iloc[100:112] = np.nan
+
+        filled = dec.gapfill(gappy, window=120, n_components=6)
+
+        self.assertTrue(filled.index.equals(co2.index))
+        self.assertEqual(filled.isnull().sum(), 0)
+        self.assertTrue(np.abs(filled - co2).max() < 2.)
+
+    def test_nan_error(self):
+        """Test that BasicSsa rejects missing values"""
+        self.assertRaises(ValueError, dec.BasicSsa, self.gappy)
+
+
+class TestForecast(unittest.TestCase):
+    """Tests for BasicSsa forecasting"""
+
+    def setUp(self):
+
+        t = np.arange(300.)
+
+        # series of finite rank 6, continued exactly by its recurrence
+
+        self.ts = 0.01 * t + np.sin(2 * np.pi * t / 12.) + 0.5 * np.sin(2 * np.pi * t / 7.)
+        self.ssa = dec.BasicSsa(self.ts[:240], window=60)
+        self.ssa.reconstruct({'Signal': range(6), 'Season': [2, 3]})
+
+    def test_finite_rank(self):
+        """Test that a finite rank series is forecast exactly"""
+        for method in ['recurrent', 'vector']:
+            forecasts = self.ssa.forecast(60, groups=['Signal'], method=method)
+
+            self.assertEqual(list(forecasts), ['Signal'])
+            self.assertTrue(np.allclose(forecasts['Signal'], self.ts[240:]))
+
+    def test_groups(self):
+        """Test that groups are forecast at once and coefficients cached"""
+        forecasts = self.ssa.forecast(12)
+        season = self.ssa.forecast(12, groups=[[2, 3]])
+
+        self.assertEqual(sorted(forecasts), ['Season', 'Signal'])
+        self.assertTrue(np.allclose(forecasts['Season'], season[(2, 3)]))
+        self.assertEqual(sorted(self.ssa._lrrcache), [(0, 1, 2, 3, 4, 5), (2, 3)])
+
+    def test_backtest(self):
+        """Test rolling origin forecasts against the series"""
+        for method in ['recurrent', 'vector']:
+            bt = self.ssa.backtest(12, groups=['Signal'], method=method, start=100)['Signal']
+
+            self.assertEqual(bt.shape, (129, 12))
+            for i in [0, 50, 128]:
+                self.assertTrue(np.allclose(bt[i], self.ts[100 + i:112 + i]))
+
+    def test_backtest_reconstruction(self):
+        """Test that backtests forecast the reconstructions of the prefixes"""
+        ts = load_co2().values
+        ssa = dec.BasicSsa(ts, window=120)
+        u = ssa.svd[0][:, [0, 3]]
+
+        for method in ['recurrent', 'vector']:
+            bt = ssa.backtest(12, groups=[[0, 3]], method=method, start=200)[(0, 3)]
+
+            for n in [200, 250, 456]:
+                # decomposition of the prefix with the same eigenvectors
+                prefix = dec.BasicSsa(ts[:n], window=120, n_components=2, solver='randomized')
+                z = np.dot(prefix._x.T, u)
+                s = np.sqrt(np.sum(z ** 2, axis=0))
+                prefix._setfactors(u, s, (z / s).T)
+
+                expected = prefix.forecast(12, groups=[[0, 1]], method=method)[(0, 1)]
+                self.assertTrue(np.allclose(bt[n - 200], expected))
+
+    def test_unicode_names(self):
+        """Test that unicode group names are not taken as index lists"""
+        ssa = dec.BasicSsa(self.ts[:240], window=60)
+        ssa.reconstruct({u'Signal': range(6), u'Season': [2, 3]})
+
+        forecasts = ssa.forecast(12)
+        self.assertEqual(sorted(forecasts), sorted(self.ssa.forecast(12)))
+        self.assertTrue(np.allclose(forecasts[u'Season'], self.ssa.forecast(12)['Season']))
+        self.assertEqual(ssa.backtest(12, groups=[u'Signal'], start=200)[u'Signal'].shape, (29, 12))
+        self.assertEqual(ssa.filter(u'Season').window, 60)
+
+    def test_errors(self):
+        """Test forecast option errors"""
+        self.assertRaises(ValueError, self.ssa.forecast, 12, method='linear')
+        self.assertRaises(ValueError, self.ssa.forecast, 12, groups=['Residuals'])
+        self.assertRaises(ValueError, self.ssa.backtest, 12, start=10)
+
+
+class TestSsaFilter(unittest.TestCase):
+    """Tests for the SsaFilter class"""
+
+    def setUp(self):
+
+        self.ts = load_co2()
+        self.groups = {'Trend': [0, 3], 'Season': [1, 2, 4, 5]}
+
+    def test_fitted_series(self):
+        """Test that filtering the fitted series gives the group series"""
+        ssa = dec.BasicSsa(self.ts, window=120)
+        ssa.reconstruct(self.groups)
+
+        for g in self.groups:
+            out = ssa.filter(g).apply(self.ts)
+
+            self.assertTrue(isinstance(out, pd.Series))
+            self.assertTrue(np.allclose(out, ssa[g]))
+
+        self.assertRaises(ValueError, ssa.filter, 'Residuals')
+        self.assertRaises(IndexError, ssa.filter, [0, 1000])
+
+    def test_new_series(self):
+        """Test filtering of a panel of new series of another length"""
+        from tsar.algorithms.hankel import _diagavg, _embed
+
+        ssa = dec.BasicSsa(self.ts, window=24)
+        ssa.reconstruct(self.groups)
+        season = ssa.filter('Season')
+
+        values = self.ts.values[:300]
+        panel = np.column_stack([values, values[::-1], 2. * values])
+        out = season.apply(panel)
+
+        u = ssa.svd[0][:, self.groups['Season']]
+
+        self.assertEqual(out.shape, panel.shape)
+        for j in range(3):
+            x = _embed(panel[:, j], 24)
+            self.assertTrue(np.allclose(out[:, j], _diagavg(np.dot(u, np.dot(u.T, x)))))
+
+        self.assertRaises(ValueError, season.apply, values[:10])
+
+
+class TestSsaCache(unittest.TestCase):
+    """Tests for the SsaCache class"""
+
+    def setUp(self):
+
+        self.ts = load_co2()
+        self.groups = {'Trend': [0, 3], 'Season': [1, 2, 4, 5]}
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmpdir)
+
+    def test_hits(self):
+        """Test that repeated decompositions are lookups with own groups"""
+        cache = dec.SsaCache()
+        ssa = dec.BasicSsa(self.ts, window=120)
+        ssa.reconstruct(self.groups)
+
+        first = cache(self.ts, window=120)
+        first.reconstruct(self.groups)
+        second = cache(self.ts.values, window=120)
+
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertTrue(second.svd[1] is first.svd[1])
+        self.assertEqual(second.groups, ['Original'])
+
+        for g in ssa.groups:
+            self.assertTrue(np.allclose(first[g], ssa[g]))
+
+        cache(self.ts, window=60)
+        cache(self.ts, window=120, n_components=6)
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (1, 3, 3))
+
+    def test_eviction(self):
+        """Test that least recently used decompositions are evicted"""
+        size = dec.SsaCache._sizeof(dec.BasicSsa(self.ts, window=24))
+        cache = dec.SsaCache(maxbytes=int(2.5 * size))
+
+        for w in [24, 25, 24, 26]:
+            cache(self.ts, window=w)
+
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(cache.nbytes <= cache.maxbytes)
+
+        cache(self.ts, window=24)
+        cache(self.ts, window=25)
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+    def test_disk_tier(self):
+        """Test that decompositions are reloaded from the disk tier"""
+        cache = dec.SsaCache(directory=self.tmpdir)
+        first = cache(self.ts, window=120)
+        first.reconstruct(self.groups)
+
+        other = dec.SsaCache(directory=self.tmpdir)
+        second = other(self.ts, window=120)
+        second.reconstruct(self.groups)
+
+        self.assertEqual((other.hits, other.disk_hits, other.misses), (1, 1, 0))
+        for g in first.groups:
+            self.assertTrue(np.allclose(first[g], second[g]))
+
+        del first, second, cache, other
+
+
+class TestWindowSweep(unittest.TestCase):
+    """Tests for the windowsweep function"""
+
+    def setUp(self):
+
+        self.ts = load_co2()
+
+    def test_matches_decomposition(self):
+        """Test that sweep diagnostics match a BasicSsa decomposition"""
+        sweep = dec.windowsweep(self.ts, windows=[24, 120], n_components=6)
+
+        self.assertEqual(sorted(sweep.keys()), [24, 120])
+
+        for w in [24, 120]:
+            ssa = dec.BasicSsa(self.ts, window=w)
+            ssa.reconstruct({'Signal': range(6)})
+            error = np.sqrt(np.mean(ssa['Residuals'] ** 2))
+
+            self.assertTrue(np.allclose(sweep[w]['values'], ssa.svd[1][:6]))
+            self.assertTrue(np.allclose(sweep[w]['wcorr'], ssa.wcorr(6), atol=1e-6))
+            self.assertAlmostEqual(sweep[w]['error'], error, places=6)
+
+    def test_window_error(self):
+        """Test that out of range windows raise ValueError"""
+        self.assertRaises(ValueError, dec.windowsweep, self.ts, windows=[0, 12])
+
+
+class TestMonteCarloSsa(unittest.TestCase):
+    """Tests for the montecarlossa function"""
+
+    def setUp(self):
+
+        rs = np.random.RandomState(3)
+        t = np.arange(1000)
+
+        self.noise = lfilter([1.], [1., -0.6], rs.standard_normal(1000))
+        self.signal = self.noise + 3. * np.sin(2 * np.pi * t / 12.)
+
+    def test_projection(self):
+        """Test surrogate projections against explicit trajectory matrices"""
+        from tsar.algorithms.hankel import _embed
+        from tsar.algorithms.montecarlossa import _ar1surrogates, _surrogatevalues
+
+        u = np.linalg.qr(np.random.RandomState(0).randn(30, 3))[0]
+        fu = np.fft.rfft(u[::-1], n=128, axis=0)
+
+        values = _surrogatevalues((5, 4, 0.7, 1., 100, 30, fu))
+        x = _ar1surrogates(0.7, 1., (4, 100), np.random.RandomState(5))
+        direct = [np.sum(np.dot(_embed(xi, 30).T, u) ** 2, axis=0) for xi in x]
+
+        self.assertTrue(np.allclose(values, direct))
+
+    def test_significance(self):
+        """Test that an oscillation is detected and red noise is not"""
+        noise = dec.montecarlossa(self.noise, window=40, n_surrogates=300, random_state=0)
+        signal = dec.montecarlossa(self.signal, window=40, n_surrogates=300, random_state=0)
+
+        self.assertAlmostEqual(noise['ar1'][0], 0.6, places=1)
+        self.assertFalse(noise['significant'].any())
+        self.assertEqual(list(signal['significant']), [True, True] + [False] * 8)
+
+    def test_parallel_batches(self):
+        """Test that results do not depend on the number of processes"""
+        kw = dict(window=40, n_surrogates=60, batchsize=25, random_state=0)
+        serial = dec.montecarlossa(self.signal, **kw)
+        parallel = dec.montecarlossa(self.signal, n_jobs=2, **kw)
+
+        self.assertEqual(serial['surrogates'].shape, (60, 10))
+        self.assertTrue(np.allclose(serial['surrogates'], parallel['surrogates']))
+
+
+class TestChangePoints(unittest.TestCase):
+    """Tests for the changepoints detector"""
+
+    def setUp(self):
+
+        rs = np.random.RandomState(0)
+        t = np.arange(600)
+
+        self.ts = np.where(t < 300, np.sin(2 * np.pi * t / 12.), np.sin(2 * np.pi * t / 7.))
+        self.ts += 0.1 * rs.standard_normal(600)
+
+    def naive(self, window, n_components, base, test, lag):
+        """Heterogeneity index with one SVD per position"""
+        from tsar.algorithms.hankel import _embed
+
+        out = []
+
+        for index in range(base + test + lag - 1, len(self.ts)):
+            b = self.ts[index - test - lag - base + 1:index - test - lag + 1]
+            u = np.linalg.svd(_embed(b, window), full_matrices=False)[0][:, :n_components]
+            x = _embed(self.ts[index - test + 1:index + 1], window)
+            out.append((index, 1. - np.sum(np.dot(u.T, x) ** 2) / np.sum(x ** 2)))
+
+        return out
+
+    def test_matches_naive(self):
+        """Test incremental statistics against one SVD per position"""
+        naive = self.naive(20, 2, 100, 60, 5)
+        stream = (value for value in self.ts)
+
+        full = list(dec.changepoints(stream, 20, 2, 100, test=60, lag=5, n_tracked=20))
+        default = list(dec.changepoints(self.ts, 20, 2, 100, test=60, lag=5))
+
+        self.assertEqual([i for i, _ in full], [i for i, _ in naive])
+        self.assertTrue(np.allclose([h for _, h in full], [h for _, h in naive]))
+        self.assertTrue(np.allclose([h for _, h in default], [h for _, h in naive], atol=0.05))
+
+    def test_detection(self):
+        """Test that the statistic rises after the change"""
+        h = np.array([h for _, h in dec.changepoints(self.ts, 20, 2, 100, test=20)])
+        index = np.arange(len(h)) + 119
+
+        self.assertTrue(h[index < 300].max() < 0.1)
+        self.assertTrue(h[(index >= 310) & (index <= 365)].min() > 0.5)
+
+    def test_argument_errors(self):
+        """Test that bad arguments raise ValueError when the detector is created"""
+        self.assertRaises(ValueError, dec.changepoints, self.ts, 20, 2, 10)
+        self.assertRaises(ValueError, dec.changepoints, self.ts, 20, 2, 100, test=10)
+        self.assertRaises(ValueError, dec.changepoints, self.ts, 20, 0, 100)
+        self.assertRaises(ValueError, dec.changepoints, self.ts, 20, 4, 100, n_tracked=3)
+        self.assertRaises(ValueError, dec.changepoints, self.ts, 20, 2, 100, lag=-1)
+
+
+class TestSequentialSsa(unittest.TestCase):
+    """Tests for the SequentialSsa class"""
+
+    def setUp(self):
+
+        self.ts = load_co2().values
+
+    def test_expanding_update(self):
+        """Test that sample updates match a batch decomposition"""
+        ssa = dec.SequentialSsa(window=24, n_components=24)
+        ssa.append(self.ts[:100])
+        for value in self.ts[100:]:
+            ssa.append(value)
+
+        batch = dec.BasicSsa(self.ts, window=24)
+        self.assertTrue(np.allclose(ssa.svd[1], batch.svd[1]))
+
+    def test_fixed_segment_update(self):
+        """Test that a fixed length segment tracks the last samples"""
+        ssa = dec.SequentialSsa(window=24, n_components=6, maxlen=240)
+        for i in range(0, len(self.ts), 37):
+            ssa.append(self.ts[i:i + 37])
+
+        batch = dec.BasicSsa(self.ts[-240:], window=24)
+        self.assertTrue(np.allclose(ssa.svd[1], batch.svd[1][:6], rtol=1e-2))
+
+        # last reconstructed value matches the diagonal averaging
+
+        ssa.reconstruct({'Trend': [0]})
+        batch.reconstruct({'Trend': [0]})
+        self.assertAlmostEqual(ssa['Trend'].values[-1], batch['Trend'].values[-1], places=6)
+
+    def test_reconstruction(self):
+        """Test that the last window samples match the batch reconstruction"""
+        groups = {'Trend': [0], 'Season': [1, 2]}
+
+        for maxlen, n in [(240, len(self.ts)), (None, len(self.ts)), (None, 30), (240, 100)]:
+            ssa = dec.SequentialSsa(window=24, n_components=24, maxlen=maxlen)
+            ssa.append(self.ts[:n])
+            ssa.reconstruct(groups)
+
+            segment = self.ts[:n] if maxlen is None else self.ts[max(0, n - maxlen):n]
+            batch = dec.BasicSsa(segment, window=24)
+            batch.reconstruct(groups)
+
+            for g in ['Original', 'Trend', 'Season']:
+                self.assertEqual(len(ssa[g]), 24)
+                self.assertTrue(np.allclose(ssa[g], batch[g].values[-24:]))
+
+    def test_window_error(self):
+        """Test that a segment shorter than the window raises ValueError"""
+        self.assertRaises(ValueError, dec.SequentialSsa, 24, maxlen=12)
+
+
+class TestPanelSsa(unittest.TestCase):
+    """Tests for the PanelSsa class"""
+
+    def setUp(self):
+
+        self.data = tsar.datasets.lorenz(n=1000)
+        self.groups = {'Trend': [0], 'Oscillations': [1, 2]}
+
+    def test_batch_reconstruction(self):
+        """Test that panel groups match per series decompositions"""
+        panel = dec.PanelSsa(self.data, window=50, n_components=10)
+        panel.reconstruct(self.groups)
+
+        self.assertEqual(panel['Trend'].columns.tolist(), ['x', 'y', 'z'])
+
+        for col in self.data.columns:
+            ssa = dec.BasicSsa(self.data[col], window=50)
+            ssa.reconstruct(self.groups)
+            for g in ['Trend', 'Oscillations', 'Residuals']:
+                self.assertTrue(np.allclose(panel[g][col], ssa[g]))
+
+    def test_ndarray_input(self):
+        """Test that arrays give arrays of shape (N, m)"""
+        panel = dec.PanelSsa(self.data.values, window=50, n_components=3)
+        panel.reconstruct({'Trend': [0]})
+        self.assertEqual(panel['Trend'].shape, self.data.shape)
+
+    def test_ndtype_error(self):
+        """Test if a 1 dimensional object raises a TypeError"""
+        self.assertRaises(TypeError, dec.PanelSsa, self.data['x'])
+
+
+class TestMultichannelSsa(unittest.TestCase):
+    """Tests for the MultichannelSsa class"""
+
+    def setUp(self):
+
+        self.data = tsar.datasets.lorenz(n=1000)
+        self.groups = {'Trend': [0], 'Oscillations': [1, 2]}
+
+    def test_block_hankel_reconstruction(self):
+        """Test that channel groups match the block-Hankel decomposition"""
+        mssa = dec.MultichannelSsa(self.data, window=50)
+        mssa.reconstruct(self.groups)
+
+        x = np.hstack([dec.BasicSsa(self.data[c], window=50)._x for c in self.data.columns])
+        u, s, v = np.linalg.svd(x, full_matrices=False)
+        k = mssa._k
+
+        xg = np.dot(u[:, [1, 2]] * s[[1, 2]], v[[1, 2], k:2 * k])
+        ts = dec.BasicSsa._antidiagmean(xg)
+
+        self.assertTrue(np.allclose(mssa['Oscillations']['y'], ts))
+        self.assertTrue(np.allclose(mssa['Trend'] + mssa['Oscillations'] + mssa['Residuals'], self.data))
+
+    def test_truncated_solver(self):
+        """Test that the truncated solver matches the full decomposition"""
+        mssa = dec.MultichannelSsa(self.data, window=50)
+        trunc = dec.MultichannelSsa(self.data, window=50, n_components=10)
+
+        mssa.reconstruct(self.groups)
+        trunc.reconstruct(self.groups)
+
+        self.assertTrue(np.allclose(trunc.svd[1], mssa.svd[1][:10]))
+        self.assertTrue(np.allclose(trunc['Oscillations'], mssa['Oscillations'], atol=1e-6))
+        self.assertTrue(np.allclose(trunc.wcorr([0, 2]), mssa.wcorr(3)[np.ix_([0, 2], [0, 2])]))
+
+    def test_forecast(self):
+        """Test that channels of finite rank are forecast with the shared recurrence"""
+        t = np.arange(300.)
+        data = pd.DataFrame({'a': 0.01 * t + np.sin(2 * np.pi * t / 12.),
+                             'b': 2. - 0.02 * t + 0.5 * np.cos(2 * np.pi * t / 12.)})
+
+        mssa = dec.MultichannelSsa(data[:240], window=60)
+        mssa.reconstruct({'Signal': range(4)})
+
+        for method in ['recurrent', 'vector']:
+            forecasts = mssa.forecast(60, method=method)
+
+            self.assertEqual(forecasts['Signal'].columns.tolist(), ['a', 'b'])
+            self.assertTrue(np.allclose(forecasts['Signal'], data[240:]))
+
+            bt = mssa.backtest(12, method=method, start=100)['Signal']
+
+            self.assertEqual(bt.shape, (129, 2, 12))
+            for i in [0, 128]:
+                self.assertTrue(np.allclose(bt[i], data.values[100 + i:112 + i].T))
+
+    def test_save_load(self):
+        """Test that a reloaded decomposition keeps channels and labels"""
+        directory = tempfile.mkdtemp()
+
+        try:
+            for data in [self.data, self.data.values]:
+                mssa = dec.MultichannelSsa(data, window=50, n_components=10)
+                mssa.reconstruct(self.groups)
+
+                path = os.path.join(directory, 'lorenz_mssa.npz')
+                mssa.save(path)
+
+                for mmap in [True, False]:
+                    loaded = dec.MultichannelSsa.load(path, mmap=mmap)
+
+                    self.assertEqual(sorted(loaded.groups), sorted(mssa.groups))
+                    for g in mssa.groups:
+                        self.assertEqual(type(loaded[g]), type(mssa[g]))
+                        self.assertTrue(np.allclose(loaded[g], mssa[g]))
+                    self.assertTrue(np.allclose(loaded.wcorr(5), mssa.wcorr(5)))
+
+                    if isinstance(data, pd.DataFrame):
+                        self.assertEqual(loaded['Trend'].columns.tolist(), ['x', 'y', 'z'])
+                        self.assertTrue(loaded['Trend'].index.equals(data.index))
+
+                    del loaded
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestToeplitzSsa(unittest.TestCase):
+    """Tests for the ToeplitzSsa class"""
+
+    def setUp(self):
+
+        self.ts = tsar.datasets.lorenz(n=2000)['x']
+
+    def test_lag_covariance_basis(self):
+        """Test that eigenvectors are the ones of the lag-covariance matrix"""
+        ssa = dec.ToeplitzSsa(self.ts, window=30)
+
+        x = self.ts.values
+        n = len(x)
+        c = [np.dot(x[:n - k], x[k:]) / (n - k) for k in range(30)]
+        cmat = np.array([[c[abs(i - j)] for j in range(30)] for i in range(30)])
+        evals = np.linalg.eigvalsh(cmat)
+
+        u = ssa.svd[0]
+        self.assertTrue(np.allclose(np.diag(np.dot(u.T, np.dot(cmat, u))), evals[::-1]))
+
+    def test_full_reconstruction(self):
+        """Test that all components sum to the original series"""
+        ssa = dec.ToeplitzSsa(self.ts, window=30)
+        ssa.reconstruct({'All': range(30)})
+        self.assertTrue(np.allclose(ssa['All'], self.ts))
+
+        # window greater than half the series length
+
+        ssa = dec.ToeplitzSsa(self.ts[:300], window=200)
+        self.assertEqual(ssa._d, 200)
+        ssa.reconstruct({'All': range(200)})
+        self.assertTrue(np.allclose(ssa['All'], self.ts[:300]))
+
+    def test_truncated(self):
+        """Test that truncation keeps the leading eigentriples"""
+        ssa = dec.ToeplitzSsa(self.ts, window=30)
+        trunc = dec.ToeplitzSsa(self.ts, window=30, n_components=5)
+        trunc.reconstruct({'Oscillations': [0, 1]})
+        ssa.reconstruct({'Oscillations': [0, 1]})
+
+        self.assertTrue(np.allclose(trunc.svd[1], ssa.svd[1][:5]))
+        self.assertTrue(np.allclose(trunc['Residuals'], ssa['Residuals']))
+
+
+if __name__ == '__main__':
+
+    unittest.main()